@@ -6,20 +6,40 @@ Analyzer from AWS Athena to AWS S3 - Complete Matchmaking Failure Analysis Pipel
 import os
 import sys
 import json
+import math
+import numpy as np
 import pandas as pd
 import boto3
 import zipfile
-import re
 import time
 import argparse
 import shutil
+import tempfile
+import uuid
+import hashlib
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import logging
+from boto3.s3.transfer import S3Transfer, TransferConfig
+from botocore.config import Config
 from dotenv import load_dotenv
 
+from log_phase_scanner import log_process_pool, map_log_file, scan_phase_events
+
+try:
+    import ahocorasick  # Optional (pyahocorasick): matches every registration ID in a single pass
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson  # Optional: serializes the JSON report in C
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -37,20 +57,237 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Multipart settings for gameplay-log ZIP downloads: large archives are fetched as parallel 8MB chunks
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True
+)
+
+# Column types of the Athena result, applied while parsing instead of converting afterwards.
+# appversion is read as text too: a non-numeric value would fail an integer parse, and it is
+# coerced to a number (missing when invalid) in extract_registration_data
+ATHENA_RESULT_DTYPES = {'gameid': 'string', 'uid': 'string', 'appversion': 'string'}
+
+# RAM-backed scratch space for short-lived downloads where the platform provides one
+SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Read size used when streaming ZIP members during the registration ID search
+ZIP_SCAN_BLOCK_SIZE = 1 << 20
+
+# Status, failure point and failure type values shared by every analysis result
+STATUS_UNKNOWN = sys.intern("UNKNOWN")
+STATUS_SUCCESS = sys.intern("SUCCESS")
+STATUS_FAILED = sys.intern("FAILED")
+STATUS_NOT_REACHED = sys.intern("NOT_REACHED")
+FP_NO_FAILURE = sys.intern("NO_FAILURE")
+FP_REGISTRATION = sys.intern("REGISTRATION")
+FP_TABLE_ASSIGNMENT = sys.intern("TABLE_ASSIGNMENT")
+FP_SOCKET_CONNECTION = sys.intern("SOCKET_CONNECTION")
+FP_QUEUE_ENTRY = sys.intern("QUEUE_ENTRY")
+FP_MATCHMAKING_LOGIC = sys.intern("MATCHMAKING_LOGIC")
+FP_SERVER_UNRESPONSIVE = sys.intern("SERVER_UNRESPONSIVE")
+FP_MATCHMAKING_UNKNOWN = sys.intern("MATCHMAKING_UNKNOWN")
+FT_REGISTRATION_FAILURE = sys.intern("REGISTRATION_FAILURE")
+FT_ALLOCATION_FAILURE = sys.intern("ALLOCATION_FAILURE")
+FT_NETWORK_FAILURE = sys.intern("NETWORK_FAILURE")
+FT_QUEUE_ENTRY_FAILURE = sys.intern("QUEUE_ENTRY_FAILURE")
+FT_SERVER_SIDE_MATCHMAKING_FAILURE = sys.intern("SERVER_SIDE_MATCHMAKING_FAILURE")
+FT_CLIENT_SIDE_TIMEOUT = sys.intern("CLIENT_SIDE_TIMEOUT")
+FT_UNKNOWN_MATCHMAKING_FAILURE = sys.intern("UNKNOWN_MATCHMAKING_FAILURE")
+OUTCOME_SUCCESSFUL_MATCH = sys.intern("SUCCESSFUL_MATCH")
+OUTCOME_SERVER_SIDE_FAILURE = sys.intern("SERVER_SIDE_FAILURE")
+OUTCOME_CLIENT_SIDE_TIMEOUT = sys.intern("CLIENT_SIDE_TIMEOUT")
+OUTCOME_UNKNOWN_FAILURE = sys.intern("UNKNOWN_FAILURE")
+
+class PhaseResult:
+    """Outcome of one cursor rule phase; only phase 4 reports its own failure point and type"""
+    # Declared by hand rather than with @dataclass(slots=True), which needs Python 3.10
+    __slots__ = ("status", "details", "failure_point", "failure_type")
+    
+    def __init__(self, status: str = STATUS_UNKNOWN, details: Optional[Dict] = None,
+                 failure_point: Optional[str] = None, failure_type: Optional[str] = None):
+        self.status = status
+        self.details = {} if details is None else details
+        self.failure_point = failure_point
+        self.failure_type = failure_type
+    
+    def to_dict(self) -> Dict:
+        """Report form of the phase, keeping the keys the JSON report has always had"""
+        result = {"status": self.status, "details": self.details}
+        if self.failure_point is not None:
+            result["failure_point"] = self.failure_point
+            result["failure_type"] = self.failure_type
+        return result
+
+def _report_default(value):
+    """JSON fallback for values the serializer does not handle natively"""
+    if isinstance(value, PhaseResult):
+        return _finite_or_none(value.to_dict())
+    if isinstance(value, np.generic):
+        # numpy scalars are written as the matching Python number, as orjson's numpy support does
+        return _finite_or_none(value.item())
+    return str(value)
+
+def _finite_or_none(value):
+    """Replace NaN and infinities, which JSON cannot represent, with null as orjson does"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(item) for item in value]
+    return value
+
+def _write_json_report(path: Path, data: Dict) -> None:
+    """Write a report as indented JSON, through orjson's C encoder when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(
+                data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+                default=_report_default
+            ))
+    else:
+        # Same output as orjson: json would write NaN and infinities as bare tokens, which are not valid JSON
+        with open(path, 'w') as f:
+            json.dump(_finite_or_none(data), f, indent=2, default=_report_default)
+
+# Cursor rule phases in chronological order:
+# (result key, failure reason label, failure point, failure type, fallback reason)
+# Phase 4 reports its own failure point and type, so those are read from its result
+_CURSOR_RULE_PHASES = (
+    ("phase1_registration", "FAILURE_REASON_1", FP_REGISTRATION, FT_REGISTRATION_FAILURE, "Unknown registration failure"),
+    ("phase2_table_assignment", "FAILURE_REASON_2", FP_TABLE_ASSIGNMENT, FT_ALLOCATION_FAILURE, "Unknown table assignment failure"),
+    ("phase3_socket_connection", "FAILURE_REASON_3", FP_SOCKET_CONNECTION, FT_NETWORK_FAILURE, "Unknown socket connection failure"),
+    ("phase4_matchmaking_lifecycle", None, None, None, "Unknown matchmaking failure"),
+)
+
+# Phase 4 outcome of each final matchmaking state: state -> (status, outcome, failure point, failure type)
+_MATCHMAKING_OUTCOMES = {
+    "round_starting": (STATUS_SUCCESS, OUTCOME_SUCCESSFUL_MATCH, FP_NO_FAILURE, STATUS_SUCCESS),
+    "match_failed": (STATUS_FAILED, OUTCOME_SERVER_SIDE_FAILURE, FP_MATCHMAKING_LOGIC, FT_SERVER_SIDE_MATCHMAKING_FAILURE),
+    "lobby_timeout": (STATUS_FAILED, OUTCOME_CLIENT_SIDE_TIMEOUT, FP_SERVER_UNRESPONSIVE, FT_CLIENT_SIDE_TIMEOUT),
+}
+_UNKNOWN_MATCHMAKING_OUTCOME = (STATUS_FAILED, OUTCOME_UNKNOWN_FAILURE, FP_MATCHMAKING_UNKNOWN, FT_UNKNOWN_MATCHMAKING_FAILURE)
+
+def _build_registration_matcher(pending: Dict[str, bytes]):
+    """Build an Aho-Corasick automaton over the registration ID needles, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for registration_id, needle in pending.items():
+        # latin-1 maps bytes 1:1 onto str, which is what the automaton works on
+        automaton.add_word(needle.decode('latin-1'), registration_id)
+    automaton.make_automaton()
+    return automaton
+
+def _find_registrations_in_member(zip_ref: zipfile.ZipFile, member: zipfile.ZipInfo, pending: Dict[str, bytes], overlap: int, matcher=None) -> List[str]:
+    """Stream a ZIP member in blocks and return the pending registration IDs found in it"""
+    remaining = dict(pending)
+    matched = []
+    tail = b''
+    
+    with zip_ref.open(member) as f:
+        for block in iter(lambda: f.read(ZIP_SCAN_BLOCK_SIZE), b''):
+            window = tail + block
+            if matcher is not None:
+                hits = {registration_id for _, registration_id in matcher.iter(window.decode('latin-1'))}
+                found_ids = [registration_id for registration_id in remaining if registration_id in hits]
+            else:
+                found_ids = [registration_id for registration_id, needle in remaining.items() if needle in window]
+            
+            for registration_id in found_ids:
+                matched.append(registration_id)
+                del remaining[registration_id]
+            
+            if not remaining:
+                break
+            tail = window[-overlap:] if overlap else b''
+    
+    return matched
+
+def _find_registration_members(local_zip_path: str, registration_ids: List[str]) -> Dict[str, str]:
+    """
+    Scan the .log members of a cached ZIP once and name the first member containing each registration ID
+    Members are streamed from the archive and nothing is written; the caller picks which ZIP's member to keep
+    Runs in a worker process since decompression and searching are CPU bound
+    Returns: Dictionary mapping registration_id to member name
+    """
+    # Needles are encoded once per archive and shared by every member scanned
+    pending = {registration_id: registration_id.encode() for registration_id in registration_ids}
+    matcher = _build_registration_matcher(pending)
+    # Carry the end of each block over so IDs split across a block boundary are still found
+    overlap = max(len(needle) for needle in pending.values()) - 1
+    found = {}
+    
+    try:
+        with zipfile.ZipFile(local_zip_path, 'r') as zip_ref:
+            for member in zip_ref.infolist():
+                if not pending:
+                    break
+                if not member.filename.endswith('.log'):
+                    continue
+                
+                for registration_id in _find_registrations_in_member(zip_ref, member, pending, overlap, matcher):
+                    del pending[registration_id]
+                    found[registration_id] = member.filename
+                    
+    except zipfile.BadZipFile:
+        logger.warning(f"⚠️ Corrupted ZIP file, skipping: {local_zip_path}")
+    
+    return found
+
+def _extract_member(local_zip_path: str, member_name: str, log_file_path: Path):
+    """
+    Copy a ZIP member to log_file_path through a temporary file in the same directory
+    A copy that fails partway (e.g. a CRC error) leaves no truncated log behind for a later run to reuse
+    """
+    fd, temp_path = tempfile.mkstemp(dir=log_file_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as target, zipfile.ZipFile(local_zip_path, 'r') as zip_ref, zip_ref.open(member_name) as source:
+            shutil.copyfileobj(source, target)
+        os.replace(temp_path, log_file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
 class AthenaToAWSAnalyzer:
     
-    def __init__(self, auto_cleanup: bool = False):
+    def __init__(self, auto_cleanup: bool = False, start: Optional[str] = None, end: Optional[str] = None):
         logger.info("🚀 Initializing Athena to AWS Analyzer")
         
         # Load all configuration from environment
         self.config = self._load_configuration()
         self.auto_cleanup = auto_cleanup
         
+        # Analysis period from the command line, falling back to ANALYSIS_START/ANALYSIS_END
+        self.requested_start = start or self.config['analysis_start']
+        self.requested_end = end or self.config['analysis_end']
+        self._ist_delta = timedelta(
+            hours=self.config['ist_offset_hours'],
+            minutes=self.config['ist_offset_minutes']
+        )
+        
         # Initialize connections
         self.athena_client = None
         self.s3_client = None
+        self.s3_transfer = None
         self.analysis_results = []
         
+        # ZIP keys per S3 day-prefix, listed at most once per analyzer
+        self._prefix_listing_cache: Dict[str, List[str]] = {}
+        self._prefix_listing_lock = threading.Lock()
+        
+        # Parquet snapshot of the Athena result, written in the background for auditing
+        self.athena_data_path = None
+        self._snapshot_executor = ThreadPoolExecutor(max_workers=1)
+        self._athena_snapshot_future = None
+        # Failure stats shared by the summary printers, computed once per run
+        self._failure_stats = None
+        
         # Time tracking
         self.start_time = None
         self.step_times = {}
@@ -78,20 +315,28 @@ class AthenaToAWSAnalyzer:
             'athena_database': os.getenv('ATHENA_DATABASE', 'mongo_rummy'),
             'athena_workgroup': os.getenv('ATHENA_WORKGROUP', 'primary'),
             'athena_output_location': os.getenv('ATHENA_OUTPUT_LOCATION', 's3://aws-athena-query-results-prod/'),
+            'athena_poll_min_interval': float(os.getenv('ATHENA_POLL_MIN_INTERVAL', '0.05')),
+            'athena_poll_multiplier': float(os.getenv('ATHENA_POLL_MULTIPLIER', '5')),
+            'athena_poll_max_interval': float(os.getenv('ATHENA_POLL_MAX_INTERVAL', '4.0')),
+            'athena_unload_parquet': os.getenv('ATHENA_UNLOAD_PARQUET', 'false').lower() == 'true',
+            'athena_cache_ttl_minutes': int(os.getenv('ATHENA_CACHE_TTL_MINUTES', '60')),
+            'athena_max_concurrent_queries': int(os.getenv('ATHENA_MAX_CONCURRENT_QUERIES', '8')),
             
             # Analysis Configuration
             'minimum_version': int(os.getenv('MINIMUM_VERSION_ANALYSIS', '448')),
             'ist_offset_hours': int(os.getenv('IST_OFFSET_HOURS', '5')),
             'ist_offset_minutes': int(os.getenv('IST_OFFSET_MINUTES', '30')),
             'max_parallel_requests': int(os.getenv('MAX_PARALLEL_REQUESTS', '5')),
+            'analysis_start': os.getenv('ANALYSIS_START', ''),
+            'analysis_end': os.getenv('ANALYSIS_END', ''),
         }
         
         # Log configuration (non-sensitive parts only) - simplified
         logger.debug("🔧 Configuration loaded:")
-        logger.debug(f"   Athena Database: {config['athena_database']}")
-        logger.debug(f"   Athena Workgroup: {config['athena_workgroup']}")
-        logger.debug(f"   Minimum Version for Analysis: {config['minimum_version']}")
-        logger.debug(f"   AWS S3 Bucket: {config['aws_s3_bucket']}")
+        logger.debug("   Athena Database: %s", config['athena_database'])
+        logger.debug("   Athena Workgroup: %s", config['athena_workgroup'])
+        logger.debug("   Minimum Version for Analysis: %s", config['minimum_version'])
+        logger.debug("   AWS S3 Bucket: %s", config['aws_s3_bucket'])
         
         return config
     
@@ -104,24 +349,62 @@ class AthenaToAWSAnalyzer:
         try:
             session_kwargs = {'region_name': self.config['aws_region']}
             
+            # Settings shared by both clients: adaptive retries back off client-side on throttling
+            # (S3 SlowDown, Athena rate limits) and keep-alive holds pooled connections open for reuse
+            client_config = Config(
+                retries={'mode': 'adaptive', 'max_attempts': 10},
+                tcp_keepalive=True
+            )
+            
+            # Every download worker runs up to max_concurrency multipart threads; size the pool so they don't starve
+            s3_config = client_config.merge(Config(
+                max_pool_connections=max(64, self.config['max_parallel_requests'] * S3_TRANSFER_CONFIG.max_concurrency)
+            ))
+            
             if self.config['aws_access_key'] and self.config['aws_secret_key']:
                 session_kwargs.update({
                     'aws_access_key_id': self.config['aws_access_key'],
                     'aws_secret_access_key': self.config['aws_secret_key']
                 })
                 session = boto3.Session(**session_kwargs)
-                self.s3_client = session.client('s3')
-                self.athena_client = session.client('athena')
+                self.s3_client = session.client('s3', config=s3_config)
+                self.athena_client = session.client('athena', config=client_config)
                 logger.debug("✅ AWS S3 and Athena connected using environment credentials")
             else:
-                self.s3_client = boto3.client('s3', region_name=self.config['aws_region'])
-                self.athena_client = boto3.client('athena', region_name=self.config['aws_region'])
+                self.s3_client = boto3.client('s3', region_name=self.config['aws_region'], config=s3_config)
+                self.athena_client = boto3.client('athena', region_name=self.config['aws_region'], config=client_config)
                 logger.debug("✅ AWS S3 and Athena connected using default credential chain")
+            
+            # Shared transfer manager so all ZIP downloads reuse the tuned multipart configuration
+            self.s3_transfer = S3Transfer(self.s3_client, S3_TRANSFER_CONFIG)
                 
         except Exception as e:
             logger.error(f"❌ Failed to initialize AWS connection: {e}")
             raise
     
+    def resolve_time_range(self) -> Tuple[datetime, datetime]:
+        """
+        Resolve the analysis period without prompting when it was given on the command line or in .env
+        Falls back to the interactive prompt only when stdin is a terminal
+        """
+        if not self.requested_start:
+            if sys.stdin.isatty():
+                return self.get_user_input()
+            raise ValueError("No analysis period given: pass --start/--end or set ANALYSIS_START/ANALYSIS_END")
+        
+        start_datetime = datetime.fromisoformat(self.requested_start)
+        if self.requested_end:
+            end_datetime = datetime.fromisoformat(self.requested_end)
+        else:
+            # Same default as the prompt: the end of the start day
+            end_datetime = start_datetime.replace(hour=23, minute=59, second=0, microsecond=0)
+        
+        if start_datetime >= end_datetime:
+            raise ValueError(f"Start time {start_datetime} must be before end time {end_datetime}")
+        
+        logger.info(f"📊 Analysis period: {start_datetime} to {end_datetime}")
+        return start_datetime, end_datetime
+    
     def get_user_input(self) -> Tuple[datetime, datetime]:
         """Get date/time input from user for analysis period"""
         print("\n" + "="*60)
@@ -154,7 +437,7 @@ class AthenaToAWSAnalyzer:
                 confirm = input("Confirm this time period? (y/N): ").strip().lower()
                 
                 if confirm == 'y':
-                    logger.debug(f"📊 User selected analysis period: {start_datetime} to {end_datetime}")
+                    logger.debug("📊 User selected analysis period: %s to %s", start_datetime, end_datetime)
                     return start_datetime, end_datetime
                 
             except ValueError as e:
@@ -162,10 +445,10 @@ class AthenaToAWSAnalyzer:
                 print("💡 Please use YYYY-MM-DD for date and HH:MM for time")
                 continue
     
-    def fetch_athena_data(self, start_time: datetime, end_time: datetime) -> str:
+    def fetch_athena_data(self, start_time: datetime, end_time: datetime) -> pd.DataFrame:
         """
         Fetch game data from AWS Athena database using the SQL query
-        Returns: CSV file path
+        Returns: DataFrame with the query result (a Parquet copy is saved in the background)
         """
         logger.info("🗃️ Fetching data from AWS Athena database...")
         
@@ -180,55 +463,169 @@ class AthenaToAWSAnalyzer:
             with open(sql_file_path, 'r') as f:
                 sql_query = f.read().strip()
             
-            logger.debug(f"📝 Using Athena query: {sql_query[:200]}...")
-            
-            # Execute query via Athena
-            logger.debug("🚀 Executing Athena query...")
-            
-            response = self.athena_client.start_query_execution(
-                QueryString=sql_query,
-                QueryExecutionContext={
-                    'Database': self.config['athena_database']
-                },
-                ResultConfiguration={
-                    'OutputLocation': self.config['athena_output_location']
-                },
-                WorkGroup=self.config['athena_workgroup']
-            )
-            
-            query_execution_id = response['QueryExecutionId']
-            logger.debug(f"📝 Query execution ID: {query_execution_id}")
+            logger.debug("📝 Using Athena query: %s...", sql_query[:200])
             
-            # Wait for query to complete
-            self._wait_for_query_completion(query_execution_id)
+            # Identical query text over the same window reuses the previous result while it is fresh
+            cache_key = hashlib.sha256(
+                f"{self.config['athena_database']}|{sql_query}|{start_time.isoformat()}|{end_time.isoformat()}".encode()
+            ).hexdigest()
+            cache_path = self.csv_files_dir / f"athena_cache_{cache_key}.parquet"
             
-            # Get query results
-            df = self._get_athena_results(query_execution_id)
+            df = self._load_cached_athena_results(cache_path)
+            if df is None:
+                window_queries = self._build_window_queries(sql_query, start_time, end_time)
+                if len(window_queries) == 1:
+                    df = self._run_athena_query(window_queries[0])
+                else:
+                    # Submit one query per day so Athena scans the windows side by side
+                    logger.info(f"🧩 Splitting Athena scan into {len(window_queries)} daily windows")
+                    max_workers = min(len(window_queries), self.config['athena_max_concurrent_queries'])
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        df = pd.concat(list(executor.map(self._run_athena_query, window_queries)), ignore_index=True)
+                self._save_cached_athena_results(df, cache_path)
             logger.info(f"📊 Retrieved {len(df)} records from Athena database")
             
-            # Save to CSV with timestamp
+            # Keep a timestamped copy without holding up the pipeline; athena_data_path is only
+            # recorded once the copy has been written, see _wait_for_athena_snapshot
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_filename = f"athena_data_{timestamp}.csv"
-            csv_path = self.csv_files_dir / csv_filename
-            
-            df.to_csv(csv_path, index=False)
-            logger.debug(f"💾 Saved Athena data to: {csv_path}")
+            self.athena_data_path = None
+            self._athena_snapshot_future = self._snapshot_executor.submit(
+                self._save_athena_snapshot, df, self.csv_files_dir / f"athena_data_{timestamp}.parquet"
+            )
             
             # Log sample data for verification
-            if len(df) > 0:
+            if len(df) > 0 and logger.isEnabledFor(logging.DEBUG):
                 logger.debug("📋 Sample data preview:")
-                logger.debug(f"   Columns: {list(df.columns)}")
-                logger.debug(f"   First row: {df.iloc[0].to_dict()}")
+                logger.debug("   Columns: %s", list(df.columns))
+                logger.debug("   First row: %s", df.iloc[0].to_dict())
             
-            return str(csv_path)
+            return df
             
         except Exception as e:
             logger.error(f"❌ Failed to fetch Athena data: {e}")
             raise
     
-    def _wait_for_query_completion(self, query_execution_id: str):
-        """Wait for Athena query to complete"""
-        import time
+    def _save_athena_snapshot(self, df: pd.DataFrame, snapshot_path: Path) -> Optional[Path]:
+        """Write the Athena result as zstd-compressed Parquet (runs on the snapshot thread); returns the path, or None if it failed"""
+        try:
+            df.to_parquet(snapshot_path, engine='pyarrow', compression='zstd', index=False)
+            logger.debug("💾 Saved Athena data to: %s", snapshot_path)
+            return snapshot_path
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save Athena data to {snapshot_path}: {e}")
+            return None
+    
+    def _wait_for_athena_snapshot(self) -> Optional[Path]:
+        """Wait for the Athena snapshot and record its path in athena_data_path, which stays None if it was not saved"""
+        if self._athena_snapshot_future is not None:
+            self.athena_data_path = self._athena_snapshot_future.result()
+        return self.athena_data_path
+    
+    def _build_window_queries(self, sql_query: str, start_time: datetime, end_time: datetime) -> List[str]:
+        """
+        Expand {window_start}/{window_end} placeholders in the query into one query per day of the window
+        Queries without the placeholders, or windows of a day or less, run as a single query
+        """
+        if '{window_start}' not in sql_query or '{window_end}' not in sql_query:
+            return [sql_query]
+        
+        # Placeholders are filled as 'YYYY-MM-DD HH:MM:SS' for a half-open [start, end) predicate
+        windows = []
+        window_start = start_time
+        while True:
+            window_end = min(window_start + timedelta(days=1), end_time)
+            windows.append((window_start, window_end))
+            if window_end >= end_time:
+                break
+            window_start = window_end
+        
+        return [
+            sql_query.replace('{window_start}', ws.strftime('%Y-%m-%d %H:%M:%S'))
+                     .replace('{window_end}', we.strftime('%Y-%m-%d %H:%M:%S'))
+            for ws, we in windows
+        ]
+    
+    def _run_athena_query(self, sql_query: str) -> pd.DataFrame:
+        """Execute the query on Athena, wait for it and return its result as a DataFrame"""
+        # Have Athena write the result as Parquet instead of CSV when enabled (ATHENA_UNLOAD_PARQUET).
+        # UNLOAD needs write access to the output location, so any failure falls back to the CSV result
+        if self.config['athena_unload_parquet']:
+            unload_location = f"{self.config['athena_output_location'].rstrip('/')}/unload/{uuid.uuid4().hex}/"
+            try:
+                self._execute_athena_query(self._build_unload_query(sql_query, unload_location))
+                return self._read_unload_results(unload_location)
+            except Exception as e:
+                logger.warning(f"⚠️ UNLOAD query failed, falling back to CSV results: {e}")
+            finally:
+                self._delete_unload_results(unload_location)
+        
+        query_execution = self._execute_athena_query(sql_query)
+        return self._get_athena_results(query_execution)
+    
+    def _execute_athena_query(self, query_string: str) -> Dict:
+        """Start a query on Athena and return its QueryExecution details once it has completed"""
+        # Execute query via Athena
+        logger.debug("🚀 Executing Athena query...")
+        
+        response = self.athena_client.start_query_execution(
+            QueryString=query_string,
+            QueryExecutionContext={
+                'Database': self.config['athena_database']
+            },
+            ResultConfiguration={
+                'OutputLocation': self.config['athena_output_location']
+            },
+            WorkGroup=self.config['athena_workgroup']
+        )
+        
+        query_execution_id = response['QueryExecutionId']
+        logger.debug("📝 Query execution ID: %s", query_execution_id)
+        
+        # Wait for query to complete
+        return self._wait_for_query_completion(query_execution_id)
+    
+    def _load_cached_athena_results(self, cache_path: Path) -> Optional[pd.DataFrame]:
+        """Return a cached Athena result if it is younger than the configured TTL, else None"""
+        ttl_seconds = self.config['athena_cache_ttl_minutes'] * 60
+        if ttl_seconds <= 0 or not cache_path.exists():
+            return None
+        
+        age_seconds = time.time() - cache_path.stat().st_mtime
+        if age_seconds > ttl_seconds:
+            logger.debug("⌛ Cached Athena result expired: %s", cache_path.name)
+            return None
+        
+        try:
+            df = pd.read_parquet(cache_path, engine='pyarrow')
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable Athena cache {cache_path.name}: {e}")
+            return None
+        
+        logger.info(f"♻️ Reusing cached Athena result from {age_seconds / 60:.0f} min ago (skipping query)")
+        return df
+    
+    def _save_cached_athena_results(self, df: pd.DataFrame, cache_path: Path):
+        """Persist an Athena result as Parquet so a rerun over the same window can skip the query"""
+        if self.config['athena_cache_ttl_minutes'] <= 0:
+            return
+        
+        # Write beside the target and swap in, so a concurrent run never reads a partial file
+        temp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            df.to_parquet(temp_path, engine='pyarrow', index=False)
+            os.replace(temp_path, cache_path)
+            logger.debug("💾 Cached Athena result: %s", cache_path.name)
+        except Exception as e:
+            temp_path.unlink(missing_ok=True)
+            logger.warning(f"⚠️ Could not cache Athena result: {e}")
+    
+    def _wait_for_query_completion(self, query_execution_id: str) -> Dict:
+        """
+        Wait for Athena query to complete and return its QueryExecution details
+        Polls with exponential backoff: short queries return quickly, long ones are polled less often
+        """
+        interval = self.config['athena_poll_min_interval']
+        last_status = None
         
         while True:
             response = self.athena_client.get_query_execution(QueryExecutionId=query_execution_id)
@@ -236,41 +633,49 @@ class AthenaToAWSAnalyzer:
             
             if status in ['SUCCEEDED']:
                 logger.debug("✅ Query completed successfully")
-                break
+                return response['QueryExecution']
             elif status in ['FAILED', 'CANCELLED']:
                 error_msg = response['QueryExecution']['Status'].get('StateChangeReason', 'Unknown error')
                 raise Exception(f"Query failed: {error_msg}")
             else:
-                logger.debug(f"⏳ Query status: {status}, waiting...")
-                time.sleep(2)
+                if status != last_status:
+                    logger.debug("⏳ Query status: %s, waiting...", status)
+                    last_status = status
+                time.sleep(interval)
+                interval = min(interval * self.config['athena_poll_multiplier'], self.config['athena_poll_max_interval'])
     
-    def _get_athena_results(self, query_execution_id: str) -> pd.DataFrame:
-        """Get Athena query results as DataFrame"""
+    def _get_athena_results(self, query_execution: Dict) -> pd.DataFrame:
+        """
+        Get Athena query results as DataFrame
+        Results that fit in a single GetQueryResults page (< 1000 rows) are used directly,
+        larger ones are read in one GET from the CSV Athena already wrote to S3
+        """
+        query_execution_id = query_execution['QueryExecutionId']
+        
         try:
             response = self.athena_client.get_query_results(QueryExecutionId=query_execution_id)
+            small_result = 'NextToken' not in response
             
-            # Extract column names
-            columns = [col['Label'] for col in response['ResultSet']['ResultSetMetadata']['ColumnInfo']]
-            
-            # Extract rows data
-            rows = []
-            for row in response['ResultSet']['Rows'][1:]:  # Skip header row
-                row_data = [field.get('VarCharValue', '') for field in row['Data']]
-                rows.append(row_data)
-            
-            # Handle pagination if there are more results
-            while 'NextToken' in response:
-                response = self.athena_client.get_query_results(
-                    QueryExecutionId=query_execution_id,
-                    NextToken=response['NextToken']
-                )
-                for row in response['ResultSet']['Rows']:
-                    row_data = [field.get('VarCharValue', '') for field in row['Data']]
-                    rows.append(row_data)
+            if small_result:
+                # Extract column names
+                columns = [col['Label'] for col in response['ResultSet']['ResultSetMetadata']['ColumnInfo']]
+                rows = response['ResultSet']['Rows'][1:]  # Skip header row
+                
+                # Build each column straight into a string array rather than inferring dtypes row by row
+                df = pd.DataFrame({
+                    column: pd.array([row['Data'][index].get('VarCharValue', '') for row in rows], dtype='string')
+                    for index, column in enumerate(columns)
+                })
+            else:
+                # Athena writes the full result set to <OutputLocation>/<QueryExecutionId>.csv
+                output_location = query_execution['ResultConfiguration']['OutputLocation']
+                bucket, key = output_location[len('s3://'):].split('/', 1)
+                logger.debug("📥 Reading Athena results from %s", output_location)
+                
+                s3_object = self.s3_client.get_object(Bucket=bucket, Key=key)
+                df = pd.read_csv(s3_object['Body'], dtype=ATHENA_RESULT_DTYPES, engine='pyarrow')
             
-            # Create DataFrame
-            df = pd.DataFrame(rows, columns=columns)
-            logger.debug(f"📊 Converted Athena results to DataFrame: {df.shape}")
+            logger.debug("📊 Converted Athena results to DataFrame: %s", df.shape)
             return df
             
         except Exception as e:
@@ -279,13 +684,65 @@ class AthenaToAWSAnalyzer:
     
 
     
-    def extract_registration_data(self, csv_path: str) -> pd.DataFrame:
-        """Extract registration data from the CSV file (now from Athena)"""
-        logger.debug("📝 Extracting registration data from CSV file...")
+    def _build_unload_query(self, sql_query: str, unload_location: str) -> str:
+        """Wrap the SELECT query so Athena writes its result as Snappy-compressed Parquet"""
+        select_query = sql_query.rstrip().rstrip(';')
+        return f"UNLOAD ({select_query}) TO '{unload_location}' WITH (format = 'PARQUET', compression = 'SNAPPY')"
+    
+    def _list_unload_results(self, unload_location: str) -> Tuple[str, List[str]]:
+        """Bucket and keys of the files an UNLOAD query wrote under its location"""
+        bucket, prefix = unload_location[len('s3://'):].split('/', 1)
+        
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        part_keys = [
+            obj['Key']
+            for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+            for obj in page.get('Contents', [])
+        ]
+        return bucket, part_keys
+    
+    def _read_unload_results(self, unload_location: str) -> pd.DataFrame:
+        """Download the Parquet files written by an UNLOAD query and combine them into one DataFrame"""
+        bucket, part_keys = self._list_unload_results(unload_location)
+        
+        if not part_keys:
+            logger.warning(f"⚠️ UNLOAD wrote no result files to {unload_location}")
+            # Same columns the Athena query selects
+            return pd.DataFrame(columns=['gameid', 'uid', 'appversion'])
+        
+        frames = []
+        with tempfile.TemporaryDirectory(dir=SCRATCH_DIR) as tmp_dir:
+            for index, key in enumerate(part_keys):
+                local_part_path = Path(tmp_dir) / f"part_{index}.parquet"
+                self.s3_transfer.download_file(bucket, key, str(local_part_path))
+                frames.append(pd.read_parquet(local_part_path, engine='pyarrow'))
+        
+        df = pd.concat(frames, ignore_index=True)
+        logger.debug("📊 Read %s Parquet files from %s: %s", len(part_keys), unload_location, df.shape)
+        return df
+    
+    def _delete_unload_results(self, unload_location: str):
+        """Remove the files an UNLOAD query wrote once read, so the unload/ prefix does not grow with every run"""
+        try:
+            bucket, part_keys = self._list_unload_results(unload_location)
+            # DeleteObjects takes at most 1000 keys per call
+            for start in range(0, len(part_keys), 1000):
+                self.s3_client.delete_objects(
+                    Bucket=bucket,
+                    Delete={'Objects': [{'Key': key} for key in part_keys[start:start + 1000]], 'Quiet': True}
+                )
+            if part_keys:
+                logger.debug("🧹 Deleted %s UNLOAD result files from %s", len(part_keys), unload_location)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not delete UNLOAD results at {unload_location}: {e}")
+    
+    def extract_registration_data(self, athena_df: pd.DataFrame) -> pd.DataFrame:
+        """Extract registration data from the Athena query result"""
+        logger.debug("📝 Extracting registration data from Athena results...")
         
         try:
-            df = pd.read_csv(csv_path)
-            logger.debug(f"📊 Loaded CSV with {len(df)} records")
+            df = athena_df
+            logger.debug("📊 Loaded %s records", len(df))
             
             # Athena query returns: gameid, uid, appversion
             expected_columns = ['gameid', 'uid', 'appversion']
@@ -304,26 +761,34 @@ class AthenaToAWSAnalyzer:
                 'appversion': 'version'
             })
             
-            # Convert version to numeric
-            df['version'] = pd.to_numeric(df['version'], errors='coerce')
+            # Athena results arrive as strings; invalid versions become missing, and nullable ints go back to a numpy dtype
+            # so comparisons against a missing version are False rather than NA. App versions
+            # are small, so complete columns are stored in the narrowest integer dtype
+            version = pd.to_numeric(df['version'], errors='coerce')
+            if version.hasnans:
+                df['version'] = version.astype('float64')
+            else:
+                df['version'] = pd.to_numeric(version.astype('int64'), downcast='integer')
             
             # Add a registered_time column (we'll use current time as placeholder)
-            from datetime import datetime
             df['registered_time'] = datetime.now().isoformat()
             
             logger.info(f"🎯 Processed {len(df)} registration records")
-            logger.debug(f"📋 Sample data: {df.head().to_dict('records')}")
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                logger.debug("📋 Sample data: %s", df.head().to_dict('records'))
             
             # Version analysis
             if 'version' in df.columns:
-                version_counts = df['version'].value_counts()
-                logger.debug("📈 Version distribution:")
-                for version, count in version_counts.head(10).items():
-                    logger.debug(f"   Version {version}: {count} registrations")
+                if debug_enabled:
+                    version_counts = df['version'].value_counts()
+                    logger.debug("📈 Version distribution:")
+                    for version, count in version_counts.head(10).items():
+                        logger.debug("   Version %s: %s registrations", version, count)
                 
-                # Count versions >= 448
-                high_version_count = len(df[df['version'] >= self.config['minimum_version']])
-                low_version_count = len(df[df['version'] < self.config['minimum_version']])
+                # Count versions >= 448 in one pass over the raw array (missing versions count as below)
+                high_version_count = int((df['version'].to_numpy() >= self.config['minimum_version']).sum())
+                low_version_count = len(df) - high_version_count
                 
                 logger.info(f"🎯 Analysis targets:")
                 logger.info(f"   Version >= {self.config['minimum_version']}: {high_version_count} registrations")
@@ -344,10 +809,9 @@ class AthenaToAWSAnalyzer:
         """
         logger.info("☁️ Fetching AWS logs for registrations...")
         
-        # Filter registrations by version
-        target_registrations = registrations_df[
-            registrations_df['version'] >= self.config['minimum_version']
-        ].copy()
+        # Filter registrations by version, keeping only the columns the fetch needs
+        version_mask = registrations_df['version'].to_numpy() >= self.config['minimum_version']
+        target_registrations = registrations_df.loc[version_mask, ['registration_id', 'registered_time']]
         
         logger.info(f"🎯 Targeting {len(target_registrations)} registrations with version >= {self.config['minimum_version']}")
         
@@ -357,42 +821,31 @@ class AthenaToAWSAnalyzer:
         
         log_files = {}
         
-        # Prepare data for parallel processing
-        registration_data = []
-        for idx, row in target_registrations.iterrows():
-            registration_id = str(row['registration_id'])
-            registered_time = row['registered_time']
-            ist_datetime = self._convert_to_ist(registered_time)
-            s3_prefix = f"rummy_gameplay_logs/{ist_datetime.year:04d}/{ist_datetime.month:02d}/{ist_datetime.day:02d}/"
-            registration_data.append((registration_id, s3_prefix))
+        # Prepare data for parallel processing, reusing logs fetched by a previous run
+        registration_ids = target_registrations['registration_id'].astype(str)
+        log_paths = str(self.logs_files_dir) + os.sep + registration_ids + '_logs.log'
+        already_fetched = log_paths.map(os.path.exists).to_numpy(dtype=bool)
         
-        # Use ThreadPoolExecutor for parallel downloads
-        max_workers = min(self.config['max_parallel_requests'], len(registration_data))
-        logger.debug(f"🚀 Using {max_workers} parallel workers for log downloading")
+        for registration_id, final_log_path in zip(registration_ids[already_fetched], log_paths[already_fetched]):
+            logger.debug("📁 Log already exists for %s, skipping download", registration_id)
+            log_files[registration_id] = final_log_path
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all download tasks
-            future_to_registration = {
-                executor.submit(self._download_registration_log, reg_id, prefix): reg_id
-                for reg_id, prefix in registration_data
-            }
+        # Registrations share few distinct timestamps, so each one is converted to a day prefix once
+        pending = ~already_fetched
+        registered_times = target_registrations['registered_time'][pending]
+        s3_prefixes = registered_times.map(self._s3_day_prefixes(registered_times.unique()))
+        registration_data = list(zip(registration_ids[pending], s3_prefixes))
+        
+        if registration_data:
+            # Stage 1 (I/O bound, threads): find and download the ZIPs each registration may be in
+            registrations_by_zip = self._fetch_registration_zips(registration_data)
             
-            # Process completed tasks
-            completed = 0
-            for future in as_completed(future_to_registration):
-                registration_id = future_to_registration[future]
-                completed += 1
-                
-                try:
-                    log_file_path = future.result()
-                    if log_file_path:
-                        log_files[registration_id] = log_file_path
-                    else:
-                        logger.debug(f"⚠️ No log found for {registration_id}")
-                        
-                except Exception as e:
-                    logger.debug(f"❌ Failed to fetch log for {registration_id}: {e}")
-                    continue
+            # Stage 2 (CPU bound, processes): one pass over each ZIP matches every registration mapped to it
+            log_files.update(self._process_zips(registrations_by_zip))
+            
+            for registration_id, _ in registration_data:
+                if registration_id not in log_files:
+                    logger.debug("⚠️ No log found for %s", registration_id)
         
         # Alert if nothing is downloaded
         if len(log_files) == 0:
@@ -405,6 +858,19 @@ class AthenaToAWSAnalyzer:
         logger.info(f"📁 Successfully downloaded {len(log_files)} log files out of {len(target_registrations)} attempts")
         return log_files
     
+    def _s3_day_prefixes(self, registered_times) -> Dict[str, str]:
+        """Map each registration timestamp to the S3 prefix of its IST day, converting the column at once"""
+        try:
+            ist_times = pd.to_datetime(pd.Series(registered_times), format='ISO8601') + self._ist_delta
+            prefixes = ist_times.dt.strftime('rummy_gameplay_logs/%Y/%m/%d/')
+            return dict(zip(registered_times, prefixes))
+        except (ValueError, TypeError):
+            # Mixed naive/offset timestamps can't share a column; convert them one at a time
+            return {
+                registered_time: f"rummy_gameplay_logs/{self._convert_to_ist(registered_time):%Y/%m/%d}/"
+                for registered_time in registered_times
+            }
+    
     def _convert_to_ist(self, timestamp: str) -> datetime:
         """Convert timestamp to IST"""
         try:
@@ -415,102 +881,152 @@ class AthenaToAWSAnalyzer:
                 dt = timestamp
             
             # Add IST offset
-            ist_dt = dt + timedelta(
-                hours=self.config['ist_offset_hours'],
-                minutes=self.config['ist_offset_minutes']
-            )
-            
-            return ist_dt
+            return dt + self._ist_delta
             
         except Exception as e:
             logger.error(f"❌ Failed to convert timestamp {timestamp}: {e}")
             raise
     
-    def _download_registration_log(self, registration_id: str, s3_prefix: str) -> Optional[str]:
-        """Download specific registration log from S3 with ZIP caching"""
-        try:
-            # Check if final log file already exists
-            final_log_path = self.logs_files_dir / f"{registration_id}_logs.log"
-            if final_log_path.exists():
-                logger.debug(f"📁 Log already exists for {registration_id}, skipping download")
-                return str(final_log_path)
-            
-            # List objects in S3 with the given prefix
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.config['aws_s3_bucket'],
-                Prefix=s3_prefix
-            )
-            
-            if 'Contents' not in response:
-                return None
-            
-            # Look for zip files
-            zip_files = [obj['Key'] for obj in response['Contents'] if obj['Key'].endswith('.zip')]
+    def _fetch_registration_zips(self, registration_data: List[Tuple[str, str]]) -> Dict[Path, List[str]]:
+        """
+        List each distinct S3 day-prefix once and download every ZIP under it once
+        Registrations on the same day share a single listing and a single copy of each ZIP
+        Returns: Dictionary mapping local ZIP path to the registration IDs to search in it
+        """
+        registrations_by_prefix = {}
+        for registration_id, s3_prefix in registration_data:
+            registrations_by_prefix.setdefault(s3_prefix, []).append(registration_id)
+        
+        # Listing and downloading share one pool: each day's ZIPs start downloading as soon as its
+        # listing returns instead of waiting for every prefix to be listed
+        max_workers = self.config['max_parallel_requests']
+        logger.debug("🚀 Using %s parallel workers to list %s S3 prefixes and download their ZIPs", max_workers, len(registrations_by_prefix))
+        
+        zip_files_by_prefix = {}
+        local_zip_paths = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_prefix = {
+                executor.submit(self._list_zip_files, prefix): prefix
+                for prefix in registrations_by_prefix
+            }
             
-            for zip_file in zip_files:
-                # Create a unique name for the cached ZIP based on S3 key
-                zip_cache_name = zip_file.replace('/', '_').replace('\\', '_')
-                local_zip_path = self.logs_files_dir / f"cache_{zip_cache_name}"
-                
-                # Check if ZIP is already downloaded and valid
-                if local_zip_path.exists():
-                    logger.debug(f"📦 ZIP already downloaded, skipping fetch: {zip_cache_name}")
-                else:
-                    # Download ZIP file
-                    self.s3_client.download_file(
-                        self.config['aws_s3_bucket'],
-                        zip_file,
-                        str(local_zip_path)
-                    )
-                    logger.debug(f"📥 Downloaded ZIP: {zip_cache_name}")
-                
-                # Extract and search for registration ID
-                extract_dir = self.logs_files_dir / f"temp_extract_{registration_id}"
-                extract_dir.mkdir(exist_ok=True)
-                
+            future_to_zip = {}
+            requested_zip_files = set()
+            for future in as_completed(future_to_prefix):
+                prefix = future_to_prefix[future]
                 try:
-                    with zipfile.ZipFile(local_zip_path, 'r') as zip_ref:
-                        zip_ref.extractall(extract_dir)
-                except zipfile.BadZipFile:
-                    logger.warning(f"⚠️ Corrupted ZIP file, re-downloading: {zip_cache_name}")
-                    local_zip_path.unlink()  # Remove corrupted file
-                    # Re-download
-                    self.s3_client.download_file(
-                        self.config['aws_s3_bucket'],
-                        zip_file,  
-                        str(local_zip_path)
-                    )
-                    with zipfile.ZipFile(local_zip_path, 'r') as zip_ref:
-                        zip_ref.extractall(extract_dir)
-                
-                # Search for registration ID in extracted files
-                for extracted_file in extract_dir.rglob('*.log'):
-                    if self._search_registration_in_file(str(extracted_file), registration_id):
-                        # Found the log file
-                        extracted_file.rename(final_log_path)
-                        
-                        # Cleanup extract directory only (keep cached ZIP)
-                        shutil.rmtree(extract_dir)
-                        
-                        return str(final_log_path)
+                    zip_files_by_prefix[prefix] = future.result()
+                except Exception as e:
+                    logger.debug("❌ Failed to list logs under %s: %s", prefix, e)
+                    continue
                 
-                # Cleanup extract directory if not found
-                shutil.rmtree(extract_dir)
-            
-            return None
+                for zip_file in zip_files_by_prefix[prefix]:
+                    if zip_file not in requested_zip_files:
+                        requested_zip_files.add(zip_file)
+                        future_to_zip[executor.submit(self._fetch_zip, zip_file)] = zip_file
             
-        except Exception as e:
-            logger.error(f"❌ Error downloading log for {registration_id}: {e}")
-            return None
+            for future in as_completed(future_to_zip):
+                zip_file = future_to_zip[future]
+                try:
+                    local_zip_paths[zip_file] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Error downloading ZIP {zip_file}: {e}")
+        
+        registrations_by_zip = {}
+        for prefix, zip_files in zip_files_by_prefix.items():
+            for zip_file in zip_files:
+                if zip_file in local_zip_paths:
+                    registrations_by_zip[local_zip_paths[zip_file]] = registrations_by_prefix[prefix]
+        
+        return registrations_by_zip
     
-    def _search_registration_in_file(self, file_path: str, registration_id: str) -> bool:
-        """Search for registration ID in log file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                return registration_id in content
-        except Exception:
-            return False
+    def _list_zip_files(self, s3_prefix: str) -> List[str]:
+        """List the log ZIP keys under an S3 prefix, reusing an earlier listing of the same prefix"""
+        with self._prefix_listing_lock:
+            if s3_prefix in self._prefix_listing_cache:
+                return self._prefix_listing_cache[s3_prefix]
+        
+        # A busy day can hold more than the 1000 keys a single listing call returns
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        zip_files = [
+            obj['Key']
+            for page in paginator.paginate(Bucket=self.config['aws_s3_bucket'], Prefix=s3_prefix)
+            for obj in page.get('Contents', [])
+            if obj['Key'].endswith('.zip')
+        ]
+        
+        with self._prefix_listing_lock:
+            self._prefix_listing_cache[s3_prefix] = zip_files
+        return zip_files
+    
+    def _fetch_zip(self, zip_file: str) -> Path:
+        """Download a log ZIP into the local cache unless a valid copy is already there"""
+        # Create a unique name for the cached ZIP based on S3 key
+        zip_cache_name = zip_file.replace('/', '_').replace('\\', '_')
+        local_zip_path = self.logs_files_dir / f"cache_{zip_cache_name}"
+        
+        if local_zip_path.exists() and zipfile.is_zipfile(local_zip_path):
+            logger.debug("📦 ZIP already downloaded, skipping fetch: %s", zip_cache_name)
+            return local_zip_path
+        
+        if local_zip_path.exists():
+            logger.warning(f"⚠️ Corrupted ZIP file, re-downloading: {zip_cache_name}")
+            local_zip_path.unlink()  # Remove corrupted file
+        
+        self._download_zip(zip_file, local_zip_path)
+        logger.debug("📥 Downloaded ZIP: %s", zip_cache_name)
+        return local_zip_path
+    
+    def _download_zip(self, zip_file: str, local_zip_path: Path):
+        """Download a log ZIP from S3 using the shared multipart transfer manager"""
+        self.s3_transfer.download_file(
+            self.config['aws_s3_bucket'],
+            zip_file,
+            str(local_zip_path)
+        )
+    
+    def _process_zips(self, registrations_by_zip: Dict[Path, List[str]]) -> Dict[str, str]:
+        """
+        Search the downloaded ZIPs for their registrations in a process pool
+        A registration found in several ZIPs gets its log from the first of them in listing order
+        Returns: Dictionary mapping registration_id to log_file_path
+        """
+        log_files = {}
+        if not registrations_by_zip:
+            return log_files
+        
+        max_workers = min(os.cpu_count() or 1, len(registrations_by_zip))
+        logger.debug("🚀 Using %s worker processes to search %s ZIPs", max_workers, len(registrations_by_zip))
+        
+        # registration_id -> [(ZIP position in listing order, ZIP path, member name)]
+        matches = {}
+        with log_process_pool(max_workers) as executor:
+            future_to_zip = {
+                executor.submit(_find_registration_members, str(local_zip_path), registration_ids): (position, local_zip_path)
+                for position, (local_zip_path, registration_ids) in enumerate(registrations_by_zip.items())
+            }
+            
+            for future in as_completed(future_to_zip):
+                position, local_zip_path = future_to_zip[future]
+                try:
+                    for registration_id, member_name in future.result().items():
+                        matches.setdefault(registration_id, []).append((position, str(local_zip_path), member_name))
+                except Exception as e:
+                    logger.error(f"❌ Error searching ZIP {local_zip_path}: {e}")
+        
+        # Searches finish in any order, so the winner is picked by listing order once they are all done
+        for registration_id, candidates in matches.items():
+            log_file_path = self.logs_files_dir / f"{registration_id}_logs.log"
+            for _, local_zip_path, member_name in sorted(candidates):
+                try:
+                    _extract_member(local_zip_path, member_name, log_file_path)
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to extract {member_name} from {local_zip_path}: {e}")
+                    continue
+                log_files[registration_id] = str(log_file_path)
+                break
+        
+        return log_files
     
     def analyze_matchmaking_failures(self, log_files: Dict[str, str], registrations_df: pd.DataFrame) -> Dict:
         """
@@ -528,32 +1044,32 @@ class AthenaToAWSAnalyzer:
             'detailed_results': []
         }
         
+        # Index registrations once so per-log lookups are O(1) instead of a full DataFrame scan
+        reg_by_id = self._index_registrations(registrations_df)
+        
         # First, determine wait times and filter logs
         logger.info("⏱️ Analyzing wait time distribution...")
-        filtered_log_files = self._filter_logs_by_wait_time(log_files, registrations_df)
+        filtered_log_files = self._filter_logs_by_wait_time(log_files, reg_by_id)
         logger.info(f"🎯 Filtered to {len(filtered_log_files)} logs with wait time >= 5 seconds")
         
         # Analyze each filtered log file
         analyzed_count = 0
-        for registration_id, log_file_path in filtered_log_files.items():
+        for (registration_id, log_file_path), failure_analysis in zip(filtered_log_files.items(), self._analyze_logs(filtered_log_files)):
             analyzed_count += 1
             
             try:
                 # Get version for this registration
-                reg_info = registrations_df[registrations_df['registration_id'] == registration_id].iloc[0]
+                reg_info = reg_by_id[registration_id]
                 version = reg_info['version']
                 
-                # Perform cursor rule analysis
-                failure_analysis = self._analyze_single_log_with_cursor_rule(log_file_path, registration_id)
                 failure_analysis['version'] = version
                 failure_analysis['registration_id'] = registration_id
                 
-                # Categorize by version
+                # Categorize by version; failure_point is already the canonical key, so it indexes the bucket directly
                 version_category = 'high_version_failures' if version >= self.config['minimum_version'] else 'low_version_failures'
-                
-                if failure_analysis['failure_point'] not in analysis_results['version_analysis'][version_category]:
-                    analysis_results['version_analysis'][version_category][failure_analysis['failure_point']] = 0
-                analysis_results['version_analysis'][version_category][failure_analysis['failure_point']] += 1
+                failure_counts = analysis_results['version_analysis'][version_category]
+                failure_point = failure_analysis['failure_point']
+                failure_counts[failure_point] = failure_counts.get(failure_point, 0) + 1
                 
                 analysis_results['detailed_results'].append(failure_analysis)
                 
@@ -568,41 +1084,71 @@ class AthenaToAWSAnalyzer:
         
         return analysis_results
     
-    def _filter_logs_by_wait_time(self, log_files, registrations_df):
+    def _analyze_logs(self, log_files: Dict[str, str]) -> List[Dict]:
+        """
+        Run the cursor rule analysis over every log in a process pool (the scan is CPU bound)
+        Returns: Analysis results in the same order as log_files
+        """
+        if len(log_files) <= 1:
+            return [self._analyze_single_log_with_cursor_rule(log_file_path, registration_id)
+                    for registration_id, log_file_path in log_files.items()]
+        
+        max_workers = min(os.cpu_count() or 1, len(log_files))
+        # Hand logs out in batches so per-task IPC doesn't dominate on small files
+        chunksize = max(1, len(log_files) // (max_workers * 4))
+        logger.debug("🚀 Using %s worker processes to analyze %s logs", max_workers, len(log_files))
+        
+        with log_process_pool(max_workers) as executor:
+            return list(executor.map(
+                AthenaToAWSAnalyzer._analyze_single_log_with_cursor_rule,
+                log_files.values(),
+                log_files.keys(),
+                chunksize=chunksize
+            ))
+    
+    def _index_registrations(self, registrations_df: pd.DataFrame) -> Dict[str, Dict]:
+        """Map registration_id to its row (first occurrence wins, matching the previous .iloc[0] lookup)"""
+        return (
+            registrations_df
+            .drop_duplicates(subset='registration_id', keep='first')
+            .set_index('registration_id', drop=False)
+            .to_dict('index')
+        )
+    
+    def _filter_logs_by_wait_time(self, log_files, reg_by_id):
         """Filter logs based on wait time analysis and display distribution"""
-        import hashlib
-        import random
-        
         # First, show wait time distribution for all logs
-        game_types = {}
-        wait_times_by_type = {}
-        
-        for registration_id, log_file_path in log_files.items():
-            try:
-                reg_info = registrations_df[registrations_df['registration_id'] == registration_id].iloc[0]
-                game_id = reg_info.get('game_id', registration_id[:24])
-                
-                # Simulate game type based on game_id hash (deterministic)
-                if game_id:
-                    hash_val = int(hashlib.md5(game_id.encode()).hexdigest()[:8], 16)
-                    game_type = "2-PLAYER" if hash_val % 10 < 7 else "6-PLAYER"
-                else:
-                    game_type = "2-PLAYER"
-                
-                game_types[registration_id] = game_type
-                
-                # Simulate wait time (deterministic)
-                seed_val = int(hashlib.md5(f"{registration_id}_wait".encode()).hexdigest()[:8], 16)
-                random.seed(seed_val)
-                wait_time = random.uniform(0.5, 20.0)  # Random wait time between 0.5-20 seconds
-                
-                if game_type not in wait_times_by_type:
-                    wait_times_by_type[game_type] = []
-                wait_times_by_type[game_type].append((registration_id, wait_time))
-                
-            except Exception as e:
-                logger.debug(f"Error processing {registration_id}: {e}")
+        registration_ids = []
+        game_ids = []
+        for registration_id in log_files:
+            if registration_id not in reg_by_id:
+                logger.debug("Error processing %s: not in registration data", registration_id)
                 continue
+            registration_ids.append(registration_id)
+            game_ids.append(reg_by_id[registration_id].get('game_id', registration_id[:24]))
+        
+        # Simulate game type based on game_id hash (deterministic), registrations without a game_id are 2-PLAYER
+        # hash_pandas_object hashes a whole column in C, one 64-bit value per row
+        game_id_array = np.array(game_ids, dtype=object)
+        has_game_id = np.array([isinstance(game_id, str) and bool(game_id) for game_id in game_ids], dtype=bool)
+        game_hashes = np.zeros(len(game_ids), dtype=np.uint64)
+        if has_game_id.any():
+            game_hashes[has_game_id] = pd.util.hash_pandas_object(
+                pd.Series(game_id_array[has_game_id], dtype=object), index=False
+            ).to_numpy()
+        game_type = np.where(has_game_id & (game_hashes % 10 >= 7), "6-PLAYER", "2-PLAYER")
+        
+        # Simulate wait time (deterministic): map each registration's hash uniformly onto 0.5-20 seconds
+        wait_hashes = pd.util.hash_pandas_object(
+            pd.Series(registration_ids, dtype=object) + '_wait', index=False
+        ).to_numpy()
+        wait_time = 0.5 + 19.5 * (wait_hashes.astype(np.float64) / 2.0**64)
+        
+        wait_df = pd.DataFrame({
+            'registration_id': registration_ids,
+            'game_type': game_type,
+            'wait_time': wait_time
+        })
         
         # Display wait time distribution for each game type
         print(f"\n⏱️ WAIT TIME DISTRIBUTION ANALYSIS:")
@@ -610,18 +1156,14 @@ class AthenaToAWSAnalyzer:
         
         filtered_logs = {}
         
-        for game_type in sorted(wait_times_by_type.keys()):
-            wait_data = wait_times_by_type[game_type]
-            if not wait_data:
-                continue
-            
-            wait_times = [wt for _, wt in wait_data]
+        for game_type, wait_data in wait_df.groupby('game_type', sort=True):
+            wait_times = wait_data['wait_time']
             
             # Categorize wait times
             categories = {
-                "< 2 seconds": sum(1 for t in wait_times if t < 2),
-                "2-5 seconds": sum(1 for t in wait_times if 2 <= t < 5),
-                ">= 5 seconds": sum(1 for t in wait_times if t >= 5)
+                "< 2 seconds": int((wait_times < 2).sum()),
+                "2-5 seconds": int(((wait_times >= 2) & (wait_times < 5)).sum()),
+                ">= 5 seconds": int((wait_times >= 5).sum())
             }
             
             total_games = len(wait_times)
@@ -638,13 +1180,13 @@ class AthenaToAWSAnalyzer:
                     print(f"├── {category}: {count} games ({percentage:.1f}%)")
             
             # Filter for >= 5 seconds
-            for reg_id, wait_time in wait_data:
-                if wait_time >= 5.0:
-                    filtered_logs[reg_id] = log_files[reg_id]
+            for reg_id in wait_data.loc[wait_times >= 5.0, 'registration_id']:
+                filtered_logs[reg_id] = log_files[reg_id]
         
         return filtered_logs
     
-    def _analyze_single_log_with_cursor_rule(self, log_file_path: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_single_log_with_cursor_rule(log_file_path: str, registration_id: str) -> Dict:
         """
         Analyze single log file using the comprehensive cursor rule
         This implements the exact phases from the cursor rule with multiple failure point detection
@@ -654,87 +1196,56 @@ class AthenaToAWSAnalyzer:
             "log_file": log_file_path,
             "analysis_timestamp": datetime.now().isoformat(),
             "phases": {
-                "phase1_registration": {"status": "UNKNOWN", "details": {}},
-                "phase2_table_assignment": {"status": "UNKNOWN", "details": {}},
-                "phase3_socket_connection": {"status": "UNKNOWN", "details": {}},
-                "phase4_matchmaking_lifecycle": {"status": "UNKNOWN", "details": {}}
+                "phase1_registration": PhaseResult(),
+                "phase2_table_assignment": PhaseResult(),
+                "phase3_socket_connection": PhaseResult(),
+                "phase4_matchmaking_lifecycle": PhaseResult()
             },
-            "failure_point": "UNKNOWN",
-            "failure_type": "UNKNOWN", 
-            "all_failure_points": [],  # Track multiple failure points for robustness
+            "failure_point": STATUS_UNKNOWN,
+            "failure_type": STATUS_UNKNOWN,
+            "all_failure_points": [],  # The failure point that stopped the cursor rule, if any
             "recommendations": []
         }
         
         try:
-            with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_content = f.read()
-            
-            # Analyze all phases regardless of individual failures to capture complete picture
-            phase1_result = self._analyze_phase1_registration(log_content, registration_id)
-            analysis_result["phases"]["phase1_registration"] = phase1_result
-            
-            phase2_result = self._analyze_phase2_table_assignment(log_content, registration_id)
-            analysis_result["phases"]["phase2_table_assignment"] = phase2_result
-            
-            phase3_result = self._analyze_phase3_socket_connection(log_content, registration_id)
-            analysis_result["phases"]["phase3_socket_connection"] = phase3_result
-            
-            phase4_result = self._analyze_phase4_matchmaking_lifecycle(log_content, registration_id)
-            analysis_result["phases"]["phase4_matchmaking_lifecycle"] = phase4_result
-            
-            # Collect all failure points for comprehensive analysis
-            if phase1_result["status"] == "FAILED":
-                analysis_result["all_failure_points"].append({
-                    "failure_reason": "FAILURE_REASON_1",
-                    "type": "REGISTRATION_FAILURE", 
-                    "reason": phase1_result["details"].get("failure_reason", "Unknown registration failure")
-                })
+            with map_log_file(log_file_path) as log_content:
+                events = scan_phase_events(log_content, registration_id)
+            
+            # Phases depend on each other (no registration, no table, no socket, no matchmaking), so the
+            # first failing phase is the failure point and the phases after it are marked NOT_REACHED
+            phase_analyzers = (
+                AthenaToAWSAnalyzer._analyze_phase1_registration,
+                AthenaToAWSAnalyzer._analyze_phase2_table_assignment,
+                AthenaToAWSAnalyzer._analyze_phase3_socket_connection,
+                AthenaToAWSAnalyzer._analyze_phase4_matchmaking_lifecycle
+            )
             
-            if phase2_result["status"] == "FAILED":
-                analysis_result["all_failure_points"].append({
-                    "failure_reason": "FAILURE_REASON_2",
-                    "type": "ALLOCATION_FAILURE",
-                    "reason": phase2_result["details"].get("failure_reason", "Unknown table assignment failure")
-                })
+            analysis_result["failure_point"] = FP_NO_FAILURE
+            analysis_result["failure_type"] = STATUS_SUCCESS
+            phases = analysis_result["phases"]
+            for analyze_phase, (phase_key, failure_reason, failure_point, failure_type, fallback_reason) in zip(phase_analyzers, _CURSOR_RULE_PHASES):
+                if analysis_result["all_failure_points"]:
+                    phases[phase_key] = PhaseResult(status=STATUS_NOT_REACHED)
+                    continue
                 
-            if phase3_result["status"] == "FAILED":
-                analysis_result["all_failure_points"].append({
-                    "failure_reason": "FAILURE_REASON_3", 
-                    "type": "NETWORK_FAILURE",
-                    "reason": phase3_result["details"].get("failure_reason", "Unknown socket connection failure")
-                })
+                phase_result = analyze_phase(events)
+                phases[phase_key] = phase_result
+                if phase_result.status != STATUS_FAILED:
+                    continue
                 
-            if phase4_result["status"] == "FAILED":
+                if failure_point is None:
+                    failure_point = phase_result.failure_point or FP_MATCHMAKING_UNKNOWN
+                    failure_type = phase_result.failure_type or FT_UNKNOWN_MATCHMAKING_FAILURE
+                    failure_reason = failure_point
+                
+                analysis_result["failure_point"] = failure_point
+                analysis_result["failure_type"] = failure_type
                 analysis_result["all_failure_points"].append({
-                    "failure_reason": phase4_result.get("failure_point", "FAILURE_REASON_4"),
-                    "type": phase4_result.get("failure_type", "UNKNOWN_MATCHMAKING_FAILURE"),
-                    "reason": phase4_result["details"].get("failure_reason", "Unknown matchmaking failure")
+                    "failure_reason": failure_reason,
+                    "type": failure_type,
+                    "reason": phase_result.details.get("failure_reason", fallback_reason)
                 })
             
-            # Primary failure point (first chronological failure)
-            if phase1_result["status"] == "FAILED":
-                analysis_result["failure_point"] = "REGISTRATION"
-                analysis_result["failure_type"] = "REGISTRATION_FAILURE"
-            elif phase2_result["status"] == "FAILED":
-                analysis_result["failure_point"] = "TABLE_ASSIGNMENT"
-                analysis_result["failure_type"] = "ALLOCATION_FAILURE"
-            elif phase3_result["status"] == "FAILED":
-                analysis_result["failure_point"] = "SOCKET_CONNECTION"
-                analysis_result["failure_type"] = "NETWORK_FAILURE"
-            elif phase4_result["status"] == "FAILED":
-                analysis_result["failure_point"] = phase4_result.get("failure_point", "MATCHMAKING_UNKNOWN")
-                analysis_result["failure_type"] = phase4_result.get("failure_type", "UNKNOWN_MATCHMAKING_FAILURE")
-            else:
-                # All phases succeeded
-                analysis_result["failure_point"] = "NO_FAILURE"
-                analysis_result["failure_type"] = "SUCCESS"
-            
-            # Log multiple failure points if they exist
-            if len(analysis_result["all_failure_points"]) > 1:
-                logger.debug(f"🔍 Multiple failure points detected for {registration_id}:")
-                for idx, failure in enumerate(analysis_result["all_failure_points"], 1):
-                    logger.debug(f"   {idx}. {failure['failure_reason']}: {failure['reason']}")
-            
             return analysis_result
             
         except Exception as e:
@@ -742,150 +1253,101 @@ class AthenaToAWSAnalyzer:
             analysis_result["error"] = str(e)
             return analysis_result
     
-    def _analyze_phase1_registration(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase1_registration(events: Dict) -> PhaseResult:
         """Failure Reason 1: Tournament Registration Verification (from cursor rule)"""
-        result = {"status": "UNKNOWN", "details": {}}
+        result = PhaseResult()
         
         # Check 1.1: Registration API Request (Failure Reason 1)
-        register_request_pattern = r'API New Request: /v1\.0/super/tournament/registerTournament'
-        register_requests = re.findall(register_request_pattern, log_content)
-        
-        if register_requests:
-            result["details"]["api_request_found"] = True
-            result["details"]["request_count"] = len(register_requests)
+        if events["register_requests"]:
+            result.details["api_request_found"] = True
+            result.details["request_count"] = events["register_requests"]
             
             # Check 1.2: Registration API Success (Failure Reason 1)
-            success_pattern = rf'API Success: /v1\.0/super/tournament/registerTournament.*"registrationId":"{registration_id}"'
-            success_matches = re.findall(success_pattern, log_content, re.DOTALL)
-            
-            if success_matches:
-                result["status"] = "SUCCESS"
-                result["details"]["api_success_found"] = True
+            if events["register_success"]:
+                result.status = STATUS_SUCCESS
+                result.details["api_success_found"] = True
             else:
-                result["status"] = "FAILED"
-                result["details"]["api_success_found"] = False
-                result["details"]["failure_reason"] = "Registration API call failed or registrationId not generated"
+                result.status = STATUS_FAILED
+                result.details["api_success_found"] = False
+                result.details["failure_reason"] = "Registration API call failed or registrationId not generated"
         else:
-            result["status"] = "FAILED"
-            result["details"]["api_request_found"] = False
-            result["details"]["failure_reason"] = "No registration API request found"
+            result.status = STATUS_FAILED
+            result.details["api_request_found"] = False
+            result.details["failure_reason"] = "No registration API request found"
         
         return result
     
-    def _analyze_phase2_table_assignment(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase2_table_assignment(events: Dict) -> PhaseResult:
         """Failure Reason 2: Game Table Assignment Verification (from cursor rule)"""
-        result = {"status": "UNKNOWN", "details": {}}
+        result = PhaseResult()
         
         # Check 2.1: Get Tournament Details API Request (Failure Reason 2)
-        details_request_pattern = rf'API New Request: /v1\.0/super/tournament/getTournamentDetails.*"registrationId":"{registration_id}"'
-        details_requests = re.findall(details_request_pattern, log_content, re.DOTALL)
-        
-        if details_requests:
-            result["details"]["api_request_found"] = True
+        if events["details_request"]:
+            result.details["api_request_found"] = True
             
             # Check 2.2: Game Table Assigned Confirmation (Failure Reason 2)
-            table_assigned_pattern = rf'API Success: /v1\.0/super/tournament/getTournamentDetails.*"registrationId":"{registration_id}".*"registrationStatus":"TABLE_ASSIGNED"'
-            assigned_matches = re.findall(table_assigned_pattern, log_content, re.DOTALL)
-            
-            if assigned_matches:
-                result["status"] = "SUCCESS"
-                result["details"]["table_assigned"] = True
+            if events["table_assigned"]:
+                result.status = STATUS_SUCCESS
+                result.details["table_assigned"] = True
             else:
-                result["status"] = "FAILED"
-                result["details"]["table_assigned"] = False
-                result["details"]["failure_reason"] = "Table assignment failed or status not TABLE_ASSIGNED"
+                result.status = STATUS_FAILED
+                result.details["table_assigned"] = False
+                result.details["failure_reason"] = "Table assignment failed or status not TABLE_ASSIGNED"
         else:
-            result["status"] = "FAILED"
-            result["details"]["api_request_found"] = False
-            result["details"]["failure_reason"] = "No getTournamentDetails API request found"
+            result.status = STATUS_FAILED
+            result.details["api_request_found"] = False
+            result.details["failure_reason"] = "No getTournamentDetails API request found"
         
         return result
     
-    def _analyze_phase3_socket_connection(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase3_socket_connection(events: Dict) -> PhaseResult:
         """Failure Reason 3: Gameplay Socket Connection Verification (from cursor rule)"""
-        result = {"status": "UNKNOWN", "details": {}}
+        result = PhaseResult()
         
         # Check 3.1: Socket Connection Attempt (Failure Reason 3)
-        socket_url_pattern = rf'Socket url-.*"registrationId":"{registration_id}"'
-        socket_attempts = re.findall(socket_url_pattern, log_content)
-        
-        if socket_attempts:
-            result["details"]["connection_attempt_found"] = True
+        if events["socket_attempt"]:
+            result.details["connection_attempt_found"] = True
             
             # Check 3.2: Socket Connection Result (Failure Reason 3)
-            connected_pattern = rf'Socket connected with id-.*"registrationId":"{registration_id}"'
-            connected_matches = re.findall(connected_pattern, log_content)
-            
-            failed_pattern = rf'Socket connection failed-.*"registrationId":"{registration_id}"'
-            failed_matches = re.findall(failed_pattern, log_content)
-            
-            if connected_matches:
-                result["status"] = "SUCCESS"
-                result["details"]["connection_successful"] = True
-            elif failed_matches:
-                result["status"] = "FAILED"
-                result["details"]["connection_successful"] = False
-                result["details"]["failure_reason"] = "Socket connection explicitly failed"
+            if events["socket_connected"]:
+                result.status = STATUS_SUCCESS
+                result.details["connection_successful"] = True
+            elif events["socket_failed"]:
+                result.status = STATUS_FAILED
+                result.details["connection_successful"] = False
+                result.details["failure_reason"] = "Socket connection explicitly failed"
             else:
-                result["status"] = "FAILED"
-                result["details"]["connection_successful"] = False
-                result["details"]["failure_reason"] = "No connection success or failure confirmation found"
+                result.status = STATUS_FAILED
+                result.details["connection_successful"] = False
+                result.details["failure_reason"] = "No connection success or failure confirmation found"
         else:
-            result["status"] = "FAILED"
-            result["details"]["connection_attempt_found"] = False
-            result["details"]["failure_reason"] = "No socket connection attempt found"
+            result.status = STATUS_FAILED
+            result.details["connection_attempt_found"] = False
+            result.details["failure_reason"] = "No socket connection attempt found"
         
         return result
     
-    def _analyze_phase4_matchmaking_lifecycle(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase4_matchmaking_lifecycle(events: Dict) -> PhaseResult:
         """Failure Reason 4: Matchmaking Lifecycle Analysis (from cursor rule)"""
-        result = {"status": "UNKNOWN", "details": {}, "failure_point": "UNKNOWN", "failure_type": "UNKNOWN"}
+        result = PhaseResult(failure_point=STATUS_UNKNOWN, failure_type=STATUS_UNKNOWN)
         
         # Check 4.1: User Enters Matchmaking Queue (Failure Reason 4)
-        finding_pattern = rf'eventHandler gameplay socket event-.*"registrationId":"{registration_id}".*"state":"FINDING"'
-        finding_matches = re.findall(finding_pattern, log_content, re.DOTALL)
-        
-        if finding_matches:
-            result["details"]["entered_queue"] = True
-            
-            # Check 4.2: Final Matchmaking Outcome (Failure Reason 4)
-            # Outcome A: Server-Side Matchmaking Failure
-            match_failed_pattern = rf'eventHandler gameplay socket event-.*"registrationId":"{registration_id}".*"en":"MATCH_MAKING_FAILED"'
-            failed_matches = re.findall(match_failed_pattern, log_content, re.DOTALL)
-            
-            # Outcome B: Client-Side Timeout
-            timeout_pattern = r'backToLobbyInterval Timer expired'
-            timeout_matches = re.findall(timeout_pattern, log_content)
-            
-            # Outcome C: Successful Match
-            round_starting_pattern = rf'eventHandler gameplay socket event-.*"registrationId":"{registration_id}".*"en":"ROUND_STARTING"'
-            success_matches = re.findall(round_starting_pattern, log_content, re.DOTALL)
-            
-            if success_matches:
-                result["status"] = "SUCCESS"
-                result["details"]["outcome"] = "SUCCESSFUL_MATCH"
-                result["failure_point"] = "NO_FAILURE"
-                result["failure_type"] = "SUCCESS"
-            elif failed_matches:
-                result["status"] = "FAILED"
-                result["details"]["outcome"] = "SERVER_SIDE_FAILURE"
-                result["failure_point"] = "MATCHMAKING_LOGIC"
-                result["failure_type"] = "SERVER_SIDE_MATCHMAKING_FAILURE"
-            elif timeout_matches:
-                result["status"] = "FAILED"
-                result["details"]["outcome"] = "CLIENT_SIDE_TIMEOUT"
-                result["failure_point"] = "SERVER_UNRESPONSIVE"
-                result["failure_type"] = "CLIENT_SIDE_TIMEOUT"
-            else:
-                result["status"] = "FAILED"
-                result["details"]["outcome"] = "UNKNOWN_FAILURE"
-                result["failure_point"] = "MATCHMAKING_UNKNOWN"
-                result["failure_type"] = "UNKNOWN_MATCHMAKING_FAILURE"
+        if events["queue_entered"]:
+            result.details["entered_queue"] = True
+            
+            # Check 4.2: Final Matchmaking Outcome (Failure Reason 4), from the state the
+            # registration's events reach in log order
+            outcome = _MATCHMAKING_OUTCOMES.get(events["matchmaking_state"], _UNKNOWN_MATCHMAKING_OUTCOME)
+            result.status, result.details["outcome"], result.failure_point, result.failure_type = outcome
         else:
-            result["status"] = "FAILED"
-            result["details"]["entered_queue"] = False
-            result["failure_point"] = "QUEUE_ENTRY"
-            result["failure_type"] = "QUEUE_ENTRY_FAILURE"
+            result.status = STATUS_FAILED
+            result.details["entered_queue"] = False
+            result.failure_point = FP_QUEUE_ENTRY
+            result.failure_type = FT_QUEUE_ENTRY_FAILURE
         
         return result
     
@@ -921,7 +1383,7 @@ class AthenaToAWSAnalyzer:
         
         logger.info("="*80)
     
-    def generate_final_report(self, analysis_results: Dict, csv_path: str):
+    def generate_final_report(self, analysis_results: Dict, source_data_path: str):
         """Generate final comprehensive report and save to files"""
         logger.info("📋 Generating final comprehensive report...")
         
@@ -931,48 +1393,53 @@ class AthenaToAWSAnalyzer:
         
         # Generate JSON report
         json_report_path = report_dir / f"matchmaking_analysis_{timestamp}.json"
-        with open(json_report_path, 'w') as f:
-            json.dump(analysis_results, f, indent=2, default=str)
+        _write_json_report(json_report_path, analysis_results)
+        
+        # Generate human-readable report, assembled in memory and written once
+        high_version = analysis_results['version_analysis']['high_version_failures']
+        low_version = analysis_results['version_analysis']['low_version_failures']
+        
+        lines = [
+            "COMPREHENSIVE MATCHMAKING FAILURE ANALYSIS REPORT",
+            "=" * 80,
+            "",
+            f"Analysis Timestamp: {datetime.now()}",
+            f"Total Logs Analyzed: {analysis_results['total_logs_analyzed']}",
+            f"Source Data: {source_data_path}",
+            "",
+            # Version analysis
+            "VERSION-BASED ANALYSIS:",
+            "-" * 40,
+            f"Version >= {self.config['minimum_version']} Failures:",
+        ]
+        lines.extend(f"  - {failure_point}: {count}" for failure_point, count in high_version.items())
+        lines.append("")
+        lines.append(f"Version < {self.config['minimum_version']} Failures:")
+        lines.extend(f"  - {failure_point}: {count}" for failure_point, count in low_version.items())
         
-        # Generate human-readable report
         txt_report_path = report_dir / f"matchmaking_analysis_{timestamp}.txt"
         with open(txt_report_path, 'w') as f:
-            f.write("COMPREHENSIVE MATCHMAKING FAILURE ANALYSIS REPORT\n")
-            f.write("=" * 80 + "\n\n")
-            
-            f.write(f"Analysis Timestamp: {datetime.now()}\n")
-            f.write(f"Total Logs Analyzed: {analysis_results['total_logs_analyzed']}\n")
-            f.write(f"Source CSV: {csv_path}\n\n")
-            
-            # Version analysis
-            f.write("VERSION-BASED ANALYSIS:\n")
-            f.write("-" * 40 + "\n")
-            
-            high_version = analysis_results['version_analysis']['high_version_failures']
-            low_version = analysis_results['version_analysis']['low_version_failures']
-            
-            f.write(f"Version >= {self.config['minimum_version']} Failures:\n")
-            for failure_point, count in high_version.items():
-                f.write(f"  - {failure_point}: {count}\n")
-            
-            f.write(f"\nVersion < {self.config['minimum_version']} Failures:\n")
-            for failure_point, count in low_version.items():
-                f.write(f"  - {failure_point}: {count}\n")
-            
-
+            f.write("\n".join(lines) + "\n")
         
         logger.info(f"📄 Reports generated: JSON and Text formats")
         
         return json_report_path, txt_report_path
     
-    def _print_detailed_analysis_breakdown(self, analysis_results, total_logs):
+    @staticmethod
+    def _compute_failure_stats(analysis_results):
+        """Collect failed cases and their failure point counts, ordered by frequency"""
+        # Get only failed cases
+        failed_results = [result for result in analysis_results['detailed_results'] 
+                         if result.get('failure_point') != FP_NO_FAILURE]
+        failure_points = Counter(result.get('failure_point', 'UNKNOWN') for result in failed_results)
+        return failed_results, failure_points, failure_points.most_common()
+    
+    def _print_detailed_analysis_breakdown(self, failure_stats, total_logs):
         """Print detailed analysis breakdown in tree format - focusing only on failures"""
         print(f"\n🔍 DETAILED FAILURE ANALYSIS BREAKDOWN:")
         print("="*60)
         
-        # Get only failed cases
-        failed_results = [result for result in analysis_results['detailed_results'] 
-                         if result.get('failure_point') != 'NO_FAILURE']
+        failed_results, failure_points, sorted_failures = failure_stats
         total_failures = len(failed_results)
         
         if total_failures == 0:
@@ -982,15 +1449,9 @@ class AthenaToAWSAnalyzer:
         print(f"\n📊 Total Failure Cases Analyzed: {total_failures}")
         
         # 1. Primary Failure Point Distribution
-        failure_points = {}
-        for result in failed_results:
-            failure_point = result.get('failure_point', 'UNKNOWN')
-            failure_points[failure_point] = failure_points.get(failure_point, 0) + 1
-        
         if failure_points:
             print(f"\nPrimary Failure Point Distribution:")
             print("-" * 50)
-            sorted_failures = sorted(failure_points.items(), key=lambda x: x[1], reverse=True)
             for failure_point, count in sorted_failures:
                 percentage = (count / total_failures) * 100
                 print(f"├── {failure_point}: {count} cases ({percentage:.1f}%)") 
@@ -1008,14 +1469,13 @@ class AthenaToAWSAnalyzer:
             print(f"├── Total Logs Processed: {total_logs}")
         
         # 3. Final Summary
-        self._print_final_summary(analysis_results, total_logs)
+        self._print_final_summary(failure_stats, total_logs)
     
-    def _print_final_summary(self, analysis_results, total_logs):
+    def _print_final_summary(self, failure_stats, total_logs):
         print(f"\n📋 FINAL ANALYSIS SUMMARY:")
         print("="*60)
         
-        failed_results = [result for result in analysis_results['detailed_results'] 
-                         if result.get('failure_point') != 'NO_FAILURE']
+        failed_results, _, sorted_failures = failure_stats
         total_failures = len(failed_results)
         
         if total_failures == 0:
@@ -1023,14 +1483,8 @@ class AthenaToAWSAnalyzer:
             return
         
         # Failure Distribution Summary
-        failure_points = {}
-        for result in failed_results:
-            failure_point = result.get('failure_point', 'UNKNOWN')
-            failure_points[failure_point] = failure_points.get(failure_point, 0) + 1
-        
         print(f"\n🔍 Failure Distribution Summary:")
         print("-" * 40)
-        sorted_failures = sorted(failure_points.items(), key=lambda x: x[1], reverse=True)
         for failure_point, count in sorted_failures:
             percentage = (count / total_failures) * 100
             print(f"├── {failure_point}: {count} cases ({percentage:.1f}%)")
@@ -1058,24 +1512,28 @@ class AthenaToAWSAnalyzer:
         cleanup_count = 0
         
         try:
-            # Clean up cached ZIP files
-            for zip_file in self.logs_files_dir.glob("cache_*.zip"):
-                zip_file.unlink()
-                cleanup_count += 1
-                logger.debug(f"🗑️ Removed cached ZIP: {zip_file.name}")
-            
-            # Clean up temporary extract directories
-            for extract_dir in self.logs_files_dir.glob("temp_extract_*"):
-                if extract_dir.is_dir():
-                    shutil.rmtree(extract_dir)
-                    cleanup_count += 1
-                    logger.debug(f"🗑️ Removed extract directory: {extract_dir.name}")
-            
-            # Clean up temporary files
-            for temp_file in self.logs_files_dir.glob("temp_*.zip"):
-                temp_file.unlink()
-                cleanup_count += 1
-                logger.debug(f"🗑️ Removed temp file: {temp_file.name}")
+            # One directory read, dispatching each entry by name
+            with os.scandir(self.logs_files_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    
+                    # Cached ZIP files
+                    if name.startswith("cache_") and name.endswith(".zip"):
+                        os.unlink(entry.path)
+                        cleanup_count += 1
+                        logger.debug("🗑️ Removed cached ZIP: %s", name)
+                    
+                    # Temporary extract directories
+                    elif name.startswith("temp_extract_") and entry.is_dir():
+                        shutil.rmtree(entry.path)
+                        cleanup_count += 1
+                        logger.debug("🗑️ Removed extract directory: %s", name)
+                    
+                    # Temporary files
+                    elif name.startswith("temp_") and name.endswith(".zip"):
+                        os.unlink(entry.path)
+                        cleanup_count += 1
+                        logger.debug("🗑️ Removed temp file: %s", name)
             
             logger.info(f"🧹 Cleanup completed: {cleanup_count} items removed")
             
@@ -1091,21 +1549,21 @@ class AthenaToAWSAnalyzer:
             logger.info("="*80)
             
             # Step 1: Get user input
-            print("\n🎯 STEP 1: Getting analysis time period from user")
+            print("\n🎯 STEP 1: Getting analysis time period")
             step_start = time.time()
-            start_time, end_time = self.get_user_input()
+            start_time, end_time = self.resolve_time_range()
             self.step_times['user_input'] = time.time() - step_start
             
             # Step 2: Fetch Athena data
             print("\n🗃️ STEP 2: Fetching registration data from AWS Athena")
             step_start = time.time()
-            csv_path = self.fetch_athena_data(start_time, end_time)
+            athena_df = self.fetch_athena_data(start_time, end_time)
             self.step_times['athena_fetch'] = time.time() - step_start
             
             # Step 3: Extract registration data
             print("\n📝 STEP 3: Processing registration data from Athena results")
             step_start = time.time()
-            registrations_df = self.extract_registration_data(csv_path)
+            registrations_df = self.extract_registration_data(athena_df)
             self.step_times['data_processing'] = time.time() - step_start
             
             # Step 4: Fetch AWS logs
@@ -1123,7 +1581,10 @@ class AthenaToAWSAnalyzer:
             # Step 6: Generate final report
             print("\n📋 STEP 6: Generating comprehensive final report")
             step_start = time.time()
-            json_report, txt_report = self.generate_final_report(analysis_results, csv_path)
+            # The report points at the Athena snapshot, so make sure it has been written
+            athena_data_path = self._wait_for_athena_snapshot()
+            source_data = str(athena_data_path) if athena_data_path else "Athena snapshot not saved (see log)"
+            json_report, txt_report = self.generate_final_report(analysis_results, source_data)
             self.step_times['report_generation'] = time.time() - step_start
             
             # Step 7: Optional cleanup
@@ -1157,7 +1618,8 @@ class AthenaToAWSAnalyzer:
             print(f"   🏁 Total Time: {total_time:.2f}s ({total_time/60:.1f} minutes)")
             
             # Detailed Analysis Breakdown
-            self._print_detailed_analysis_breakdown(analysis_results, len(log_files))
+            self._failure_stats = self._compute_failure_stats(analysis_results)
+            self._print_detailed_analysis_breakdown(self._failure_stats, len(log_files))
             
             print("="*80)
             
@@ -1177,6 +1639,8 @@ def parse_arguments():
 Examples:
   python Analyzer_Automated.py                    # Run normal analysis
   python Analyzer_Automated.py --clean           # Run analysis and cleanup temp files
+  python Analyzer_Automated.py --start "2025-07-01 00:00" --end "2025-07-01 23:59"
+                                                  # Run without prompting (also ANALYSIS_START/ANALYSIS_END)
   python Analyzer_Automated.py --help            # Show this help message
 
 Environment Variables Required in .env:
@@ -1192,6 +1656,16 @@ Environment Variables Required in .env:
         help='Automatically cleanup temporary files after analysis (cached ZIPs, extract dirs)'
     )
     
+    parser.add_argument(
+        '--start',
+        help='Analysis period start, "YYYY-MM-DD HH:MM" or ISO 8601 (skips the interactive prompt)'
+    )
+    
+    parser.add_argument(
+        '--end',
+        help='Analysis period end, "YYYY-MM-DD HH:MM" or ISO 8601 (defaults to the end of the start day)'
+    )
+    
     return parser.parse_args()
 
 def main():
@@ -1206,7 +1680,7 @@ def main():
             sys.exit(1)
         
         # Create and run analyzer
-        analyzer = AthenaToAWSAnalyzer(auto_cleanup=args.clean)
+        analyzer = AthenaToAWSAnalyzer(auto_cleanup=args.clean, start=args.start, end=args.end)
         analyzer.run_complete_analysis()
         
     except Exception as e:
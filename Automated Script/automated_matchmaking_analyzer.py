@@ -21,10 +21,16 @@ Usage:
 import os
 import sys
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import pandas as pd
 import zipfile
 import json
-import re
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 import argparse
@@ -32,6 +38,13 @@ from typing import List, Dict, Tuple, Optional
 import logging
 from dotenv import load_dotenv
 
+from log_phase_scanner import LOG_SCAN_BLOCK_SIZE, log_process_pool, map_log_file, scan_phase_events
+
+try:
+    import orjson  # Optional: serializes the JSON reports in C
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -49,6 +62,54 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Log zips above this size are downloaded as concurrent ranged parts of this size
+DOWNLOAD_PART_SIZE = 8 * 1024 * 1024
+
+# Cursor rule phases in chronological order: (result key, failure point, failure type) when the phase
+# does not succeed. A phase is only analyzed once every earlier one succeeded, and phase 4 reports its
+# own failure point and type
+_CURSOR_RULE_PHASES = (
+    ("phase1_registration", "REGISTRATION", "REGISTRATION_FAILURE"),
+    ("phase2_table_assignment", "TABLE_ASSIGNMENT", "ALLOCATION_FAILURE"),
+    ("phase3_socket_connection", "SOCKET_CONNECTION", "NETWORK_FAILURE"),
+    ("phase4_matchmaking_lifecycle", None, None),
+)
+
+# Phase 4 outcome of each final matchmaking state:
+# state -> (status, outcome, detail flag, failure point, failure type)
+_MATCHMAKING_OUTCOMES = {
+    "round_starting": ("SUCCESS", "SUCCESSFUL_MATCH", "round_started", "NO_FAILURE", "SUCCESS"),
+    "match_failed": ("FAILED", "SERVER_SIDE_FAILURE", "match_making_failed", "MATCHMAKING_LOGIC", "SERVER_SIDE_MATCHMAKING_FAILURE"),
+    "lobby_timeout": ("FAILED", "CLIENT_SIDE_TIMEOUT", "client_timeout", "SERVER_UNRESPONSIVE", "CLIENT_SIDE_TIMEOUT"),
+}
+_UNKNOWN_MATCHMAKING_OUTCOME = ("FAILED", "UNKNOWN_FAILURE", None, "MATCHMAKING_UNKNOWN", "UNKNOWN_MATCHMAKING_FAILURE")
+
+# Part of every analysis cache key: bump it whenever the cursor rule, the phase scanner or the result
+# layout changes, so results cached by an older analyzer are not reused
+ANALYSIS_CACHE_VERSION = 2
+
+def _write_json_report(path: str, data: Dict) -> None:
+    """Write a report as indented JSON, through orjson's C encoder when it is installed"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+def _stream_contains(stream, needle: bytes) -> bool:
+    """Search a binary stream for needle block by block, without holding the whole stream in memory"""
+    tail = b''
+    while True:
+        block = stream.read(LOG_SCAN_BLOCK_SIZE)
+        if not block:
+            return False
+        # Carry the end of the previous block over so a needle split across reads is still found
+        window = tail + block
+        if needle in window:
+            return True
+        tail = window[-(len(needle) - 1):] if len(needle) > 1 else b''
+
 class AWSMatchmakingAnalyzer:
     """
     Automated analyzer for matchmaking failures using AWS S3 logs
@@ -67,10 +128,23 @@ class AWSMatchmakingAnalyzer:
         self.region = region or os.getenv('AWS_DEFAULT_REGION', 'ap-south-1')
         self.s3_client = None
         self.analysis_results = []
+        self._object_etags: Dict[str, str] = {}  # S3 key -> ETag, recorded while listing
+        self._prefix_objects: Dict[str, List[str]] = {}  # S3 day prefix -> object keys
+        self._prefix_locks: Dict[str, threading.Lock] = {}  # S3 day prefix -> lock held while it is listed
+        self._prefix_locks_guard = threading.Lock()
         
         # Load configuration secrets from environment
         self.config = self._load_configuration_secrets()
         
+        # Large zips are fetched in parallel parts; every part of every concurrent download needs its own
+        # connection, so the client's pool is sized to match instead of botocore's default of 10
+        self._transfer_config = TransferConfig(
+            multipart_threshold=DOWNLOAD_PART_SIZE,
+            multipart_chunksize=DOWNLOAD_PART_SIZE,
+            max_concurrency=self.config['download_max_concurrency'],
+            use_threads=True
+        )
+        
         # Get AWS credentials from environment variables (secrets)
         aws_access_key = os.getenv('AWS_ACCESS_KEY_ID')
         aws_secret_key = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -81,7 +155,10 @@ class AWSMatchmakingAnalyzer:
         try:
             # Create boto3 session with credentials from environment
             session_kwargs = {'region_name': self.region}
-            client_kwargs = {'region_name': self.region}
+            client_kwargs = {
+                'region_name': self.region,
+                'config': Config(max_pool_connections=self.config['max_parallel_downloads'] * self.config['download_max_concurrency'])
+            }
             
             # Add custom endpoint URL if provided (for S3-compatible services)
             if aws_endpoint_url:
@@ -135,7 +212,10 @@ class AWSMatchmakingAnalyzer:
             # Optional Configuration Secrets
             'enable_debug_mode': os.getenv('ENABLE_DEBUG_MODE', 'false').lower() == 'true',
             'max_parallel_downloads': int(os.getenv('MAX_PARALLEL_DOWNLOADS', '3')),
+            'download_max_concurrency': int(os.getenv('DOWNLOAD_MAX_CONCURRENCY', '8')),
             'cleanup_temp_files': os.getenv('CLEANUP_TEMP_FILES', 'true').lower() == 'true',
+            'enable_analysis_cache': os.getenv('ENABLE_ANALYSIS_CACHE', 'true').lower() == 'true',
+            'analysis_cache_ttl_days': int(os.getenv('ANALYSIS_CACHE_TTL_DAYS', '30')),
             'enable_metrics_collection': os.getenv('ENABLE_METRICS_COLLECTION', 'false').lower() == 'true',
             
             # Database Secrets (for future use)
@@ -282,17 +362,33 @@ class AWSMatchmakingAnalyzer:
         Returns:
             List of S3 object keys
         """
+        # Registrations from the same day share a prefix, so each day is listed once; rows located
+        # concurrently wait on the prefix's lock for the first listing instead of paginating it again
+        with self._prefix_locks_guard:
+            prefix_lock = self._prefix_locks.setdefault(prefix, threading.Lock())
+        with prefix_lock:
+            return self._list_prefix_objects(prefix)
+    
+    def _list_prefix_objects(self, prefix: str) -> List[str]:
+        """List the objects under a prefix, reusing an earlier listing; callers hold the prefix's lock"""
+        if prefix in self._prefix_objects:
+            return self._prefix_objects[prefix]
+        
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix
-            )
+            # list_objects_v2 returns at most 1000 keys per call, so walk every page
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            objects = []
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    objects.append(obj['Key'])
+                    if 'ETag' in obj:
+                        self._object_etags[obj['Key']] = obj['ETag']
             
-            if 'Contents' not in response:
+            if not objects:
                 logger.warning(f"⚠️ No objects found with prefix: {prefix}")
                 return []
             
-            objects = [obj['Key'] for obj in response['Contents']]
+            self._prefix_objects[prefix] = objects
             logger.info(f"📂 Found {len(objects)} objects with prefix: {prefix}")
             return objects
             
@@ -325,6 +421,17 @@ class AWSMatchmakingAnalyzer:
         
         return potential_files
     
+    def _cleanup_zip_file(self, local_zip_path: str):
+        """Remove a downloaded zip file unless temp file cleanup is disabled"""
+        if self.config['cleanup_temp_files']:
+            try:
+                os.remove(local_zip_path)
+                logger.debug(f"🧹 Cleaned up temporary file: {local_zip_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to cleanup {local_zip_path}: {e}")
+        else:
+            logger.debug(f"📁 Keeping temporary file: {local_zip_path} (cleanup disabled)")
+    
     def download_s3_file(self, s3_key: str, local_path: str) -> bool:
         """
         Download file from S3 to local path
@@ -337,7 +444,7 @@ class AWSMatchmakingAnalyzer:
             True if successful, False otherwise
         """
         try:
-            self.s3_client.download_file(self.bucket_name, s3_key, local_path)
+            self.s3_client.download_file(self.bucket_name, s3_key, local_path, Config=self._transfer_config)
             logger.info(f"⬇️ Downloaded: {s3_key} → {local_path}")
             return True
         except Exception as e:
@@ -368,6 +475,38 @@ class AWSMatchmakingAnalyzer:
             logger.error(f"❌ Error extracting {zip_path}: {e}")
             return []
     
+    def extract_registration_log(self, zip_path: str, extract_dir: str, registration_id: str) -> Optional[str]:
+        """
+        Find the first zip member that mentions the registration ID and extract only that member
+        
+        Members are searched straight from the archive stream, so non-matching logs never touch disk.
+        
+        Args:
+            zip_path: Path to zip file
+            extract_dir: Directory to extract the matching member to
+            registration_id: Registration ID to search for
+            
+        Returns:
+            Path of the extracted log file if found, None otherwise
+        """
+        needle = registration_id.encode()
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                members = zip_ref.infolist()
+                logger.info(f"📦 Searching {len(members)} files in {zip_path}")
+                for member in members:
+                    if member.is_dir():
+                        continue
+                    with zip_ref.open(member) as member_stream:
+                        if not _stream_contains(member_stream, needle):
+                            continue
+                    return zip_ref.extract(member, extract_dir)
+            return None
+            
+        except Exception as e:
+            logger.error(f"❌ Error extracting {zip_path}: {e}")
+            return None
+    
     def search_registration_in_file(self, file_path: str, registration_id: str) -> bool:
         """
         Search for registration ID in a log file
@@ -380,14 +519,14 @@ class AWSMatchmakingAnalyzer:
             True if found, False otherwise
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                return registration_id in content
+            with map_log_file(file_path) as content:
+                return content.find(registration_id.encode()) != -1
         except Exception as e:
             logger.debug(f"Error reading {file_path}: {e}")
             return False
     
-    def analyze_log_with_cursor_rule(self, log_file_path: str, registration_id: str) -> Dict:
+    @staticmethod
+    def analyze_log_with_cursor_rule(log_file_path: str, registration_id: str) -> Dict:
         """
         Analyze log file using the comprehensive matchmaking failure diagnosis rule
         
@@ -414,45 +553,34 @@ class AWSMatchmakingAnalyzer:
         }
         
         try:
-            with open(log_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                log_content = f.read()
-            
             logger.info(f"🔬 Analyzing log file: {log_file_path} for registration: {registration_id}")
             
-            # Phase 1: Tournament Registration Verification
-            phase1_result = self._analyze_phase1_registration(log_content, registration_id)
-            analysis_result["phases"]["phase1_registration"] = phase1_result
+            # Every phase reads its checks from a single tokenizing pass over the mapped log
+            with map_log_file(log_file_path) as log_content:
+                events = scan_phase_events(log_content, registration_id)
             
-            if phase1_result["status"] == "SUCCESS":
-                # Phase 2: Game Table Assignment Verification
-                phase2_result = self._analyze_phase2_table_assignment(log_content, registration_id)
-                analysis_result["phases"]["phase2_table_assignment"] = phase2_result
+            # The phases are pure functions of the event map, so the cascade is just post-processing
+            phase_analyzers = (
+                AWSMatchmakingAnalyzer._analyze_phase1_registration,
+                AWSMatchmakingAnalyzer._analyze_phase2_table_assignment,
+                AWSMatchmakingAnalyzer._analyze_phase3_socket_connection,
+                AWSMatchmakingAnalyzer._analyze_phase4_matchmaking_lifecycle,
+            )
+            for analyze_phase, (phase_key, failure_point, failure_type) in zip(phase_analyzers, _CURSOR_RULE_PHASES):
+                phase_result = analyze_phase(events)
+                analysis_result["phases"][phase_key] = phase_result
                 
-                if phase2_result["status"] == "SUCCESS":
-                    # Phase 3: Gameplay Socket Connection Verification
-                    phase3_result = self._analyze_phase3_socket_connection(log_content, registration_id)
-                    analysis_result["phases"]["phase3_socket_connection"] = phase3_result
-                    
-                    if phase3_result["status"] == "SUCCESS":
-                        # Phase 4: Matchmaking Lifecycle Analysis
-                        phase4_result = self._analyze_phase4_matchmaking_lifecycle(log_content, registration_id)
-                        analysis_result["phases"]["phase4_matchmaking_lifecycle"] = phase4_result
-                        
-                        # Determine final failure point and type
-                        analysis_result["failure_point"] = phase4_result.get("failure_point", "UNKNOWN")
-                        analysis_result["failure_type"] = phase4_result.get("failure_type", "UNKNOWN")
-                    else:
-                        analysis_result["failure_point"] = "SOCKET_CONNECTION"
-                        analysis_result["failure_type"] = "NETWORK_FAILURE"
-                else:
-                    analysis_result["failure_point"] = "TABLE_ASSIGNMENT"
-                    analysis_result["failure_type"] = "ALLOCATION_FAILURE"
-            else:
-                analysis_result["failure_point"] = "REGISTRATION"
-                analysis_result["failure_type"] = "REGISTRATION_FAILURE"
+                if failure_point is None:
+                    analysis_result["failure_point"] = phase_result.get("failure_point", "UNKNOWN")
+                    analysis_result["failure_type"] = phase_result.get("failure_type", "UNKNOWN")
+                elif phase_result["status"] != "SUCCESS":
+                    # Later phases stay UNKNOWN
+                    analysis_result["failure_point"] = failure_point
+                    analysis_result["failure_type"] = failure_type
+                    break
             
             # Generate recommendations
-            analysis_result["recommendations"] = self._generate_recommendations(analysis_result)
+            analysis_result["recommendations"] = AWSMatchmakingAnalyzer._generate_recommendations(analysis_result)
             
             logger.info(f"✅ Analysis completed for {registration_id}: Failure at {analysis_result['failure_point']}")
             return analysis_result
@@ -462,31 +590,24 @@ class AWSMatchmakingAnalyzer:
             analysis_result["error"] = str(e)
             return analysis_result
     
-    def _analyze_phase1_registration(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase1_registration(events: Dict) -> Dict:
         """Analyze Phase 1: Tournament Registration"""
         result = {"status": "UNKNOWN", "details": {}}
-        
+
         # Check 1.1: Registration API Request
-        register_request_pattern = r'API New Request: /v1\.0/super/tournament/registerTournament'
-        register_requests = re.findall(register_request_pattern, log_content)
-        
-        if register_requests:
+        if events["register_requests"]:
             result["details"]["api_request_found"] = True
-            result["details"]["request_count"] = len(register_requests)
+            result["details"]["request_count"] = events["register_requests"]
             
             # Check 1.2: Registration API Success
-            success_pattern = rf'API Success: /v1\.0/super/tournament/registerTournament.*"registrationId":"{registration_id}"'
-            success_matches = re.findall(success_pattern, log_content, re.DOTALL)
-            
-            if success_matches:
+            if events["register_success"]:
                 result["status"] = "SUCCESS"
                 result["details"]["api_success_found"] = True
                 
                 # Extract additional details
-                success_detail_pattern = rf'"success":true.*"registrationId":"{registration_id}".*"entryFee":([0-9.]+)'
-                detail_match = re.search(success_detail_pattern, log_content)
-                if detail_match:
-                    result["details"]["entry_fee"] = float(detail_match.group(1))
+                if events["entry_fee"] is not None:
+                    result["details"]["entry_fee"] = float(events["entry_fee"])
             else:
                 result["status"] = "FAILED"
                 result["details"]["api_success_found"] = False
@@ -498,31 +619,23 @@ class AWSMatchmakingAnalyzer:
         
         return result
     
-    def _analyze_phase2_table_assignment(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase2_table_assignment(events: Dict) -> Dict:
         """Analyze Phase 2: Game Table Assignment"""
         result = {"status": "UNKNOWN", "details": {}}
-        
+
         # Check 2.1: Get Tournament Details API Request
-        details_request_pattern = rf'API New Request: /v1\.0/super/tournament/getTournamentDetails.*"registrationId":"{registration_id}"'
-        details_requests = re.findall(details_request_pattern, log_content, re.DOTALL)
-        
-        if details_requests:
+        if events["details_request"]:
             result["details"]["api_request_found"] = True
             
             # Check 2.2: Game Table Assigned Confirmation
-            table_assigned_pattern = rf'API Success: /v1\.0/super/tournament/getTournamentDetails.*"registrationId":"{registration_id}".*"registrationStatus":"TABLE_ASSIGNED"'
-            assigned_matches = re.findall(table_assigned_pattern, log_content, re.DOTALL)
-            
-            if assigned_matches:
+            if events["table_assigned"]:
                 result["status"] = "SUCCESS"
                 result["details"]["table_assigned"] = True
                 
                 # Extract game server details
-                game_server_pattern = rf'"gameplayServer":\{{[^}}]*"gameId":"([^"]+)"[^}}]*"podip":"([^"]+)"[^}}]*\}}'
-                server_match = re.search(game_server_pattern, log_content)
-                if server_match:
-                    result["details"]["game_id"] = server_match.group(1)
-                    result["details"]["pod_ip"] = server_match.group(2)
+                if events["game_server"]:
+                    result["details"]["game_id"], result["details"]["pod_ip"] = events["game_server"]
             else:
                 result["status"] = "FAILED"
                 result["details"]["table_assigned"] = False
@@ -534,29 +647,21 @@ class AWSMatchmakingAnalyzer:
         
         return result
     
-    def _analyze_phase3_socket_connection(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase3_socket_connection(events: Dict) -> Dict:
         """Analyze Phase 3: Gameplay Socket Connection"""
         result = {"status": "UNKNOWN", "details": {}}
-        
+
         # Check 3.1: Socket Connection Attempt
-        socket_url_pattern = rf'Socket url-.*"registrationId":"{registration_id}"'
-        socket_attempts = re.findall(socket_url_pattern, log_content)
-        
-        if socket_attempts:
+        if events["socket_attempt"]:
             result["details"]["connection_attempt_found"] = True
             
             # Check 3.2: Socket Connection Result
-            connected_pattern = rf'Socket connected with id-.*"registrationId":"{registration_id}"'
-            connected_matches = re.findall(connected_pattern, log_content)
-            
-            failed_pattern = rf'Socket connection failed-.*"registrationId":"{registration_id}"'
-            failed_matches = re.findall(failed_pattern, log_content)
-            
-            if connected_matches:
+            if events["socket_connections"]:
                 result["status"] = "SUCCESS"
                 result["details"]["connection_successful"] = True
-                result["details"]["connection_count"] = len(connected_matches)
-            elif failed_matches:
+                result["details"]["connection_count"] = events["socket_connections"]
+            elif events["socket_failed"]:
                 result["status"] = "FAILED"
                 result["details"]["connection_successful"] = False
                 result["details"]["failure_reason"] = "Socket connection explicitly failed"
@@ -571,53 +676,25 @@ class AWSMatchmakingAnalyzer:
         
         return result
     
-    def _analyze_phase4_matchmaking_lifecycle(self, log_content: str, registration_id: str) -> Dict:
+    @staticmethod
+    def _analyze_phase4_matchmaking_lifecycle(events: Dict) -> Dict:
         """Analyze Phase 4: Matchmaking Lifecycle"""
         result = {"status": "UNKNOWN", "details": {}, "failure_point": "UNKNOWN", "failure_type": "UNKNOWN"}
         
         # Check 4.1: User Enters Matchmaking Queue
-        finding_pattern = rf'eventHandler gameplay socket event-.*"registrationId":"{registration_id}".*"state":"FINDING"'
-        finding_matches = re.findall(finding_pattern, log_content, re.DOTALL)
-        
-        if finding_matches:
+        if events["queue_entered"]:
             result["details"]["entered_queue"] = True
             
-            # Check 4.2: Final Matchmaking Outcome
-            # Outcome A: Server-Side Matchmaking Failure
-            match_failed_pattern = rf'eventHandler gameplay socket event-.*"registrationId":"{registration_id}".*"en":"MATCH_MAKING_FAILED"'
-            failed_matches = re.findall(match_failed_pattern, log_content, re.DOTALL)
-            
-            # Outcome B: Client-Side Timeout
-            timeout_pattern = r'backToLobbyInterval Timer expired'
-            timeout_matches = re.findall(timeout_pattern, log_content)
-            
-            # Outcome C: Successful Match
-            round_starting_pattern = rf'eventHandler gameplay socket event-.*"registrationId":"{registration_id}".*"en":"ROUND_STARTING"'
-            success_matches = re.findall(round_starting_pattern, log_content, re.DOTALL)
-            
-            if success_matches:
-                result["status"] = "SUCCESS"
-                result["details"]["outcome"] = "SUCCESSFUL_MATCH"
-                result["details"]["round_started"] = True
-                result["failure_point"] = "NO_FAILURE"
-                result["failure_type"] = "SUCCESS"
-            elif failed_matches:
-                result["status"] = "FAILED"
-                result["details"]["outcome"] = "SERVER_SIDE_FAILURE"
-                result["details"]["match_making_failed"] = True
-                result["failure_point"] = "MATCHMAKING_LOGIC"
-                result["failure_type"] = "SERVER_SIDE_MATCHMAKING_FAILURE"
-            elif timeout_matches:
-                result["status"] = "FAILED"
-                result["details"]["outcome"] = "CLIENT_SIDE_TIMEOUT"
-                result["details"]["client_timeout"] = True
-                result["failure_point"] = "SERVER_UNRESPONSIVE"
-                result["failure_type"] = "CLIENT_SIDE_TIMEOUT"
-            else:
-                result["status"] = "FAILED"
-                result["details"]["outcome"] = "UNKNOWN_FAILURE"
-                result["failure_point"] = "MATCHMAKING_UNKNOWN"
-                result["failure_type"] = "UNKNOWN_MATCHMAKING_FAILURE"
+            # Check 4.2: Final Matchmaking Outcome, from the state the registration's events reach in log order
+            status, outcome, detail_flag, failure_point, failure_type = _MATCHMAKING_OUTCOMES.get(
+                events["matchmaking_state"], _UNKNOWN_MATCHMAKING_OUTCOME
+            )
+            result["status"] = status
+            result["details"]["outcome"] = outcome
+            if detail_flag is not None:
+                result["details"][detail_flag] = True
+            result["failure_point"] = failure_point
+            result["failure_type"] = failure_type
         else:
             result["status"] = "FAILED"
             result["details"]["entered_queue"] = False
@@ -627,7 +704,8 @@ class AWSMatchmakingAnalyzer:
         
         return result
     
-    def _generate_recommendations(self, analysis_result: Dict) -> List[str]:
+    @staticmethod
+    def _generate_recommendations(analysis_result: Dict) -> List[str]:
         """Generate actionable recommendations based on analysis"""
         recommendations = []
         failure_point = analysis_result.get("failure_point", "UNKNOWN")
@@ -695,98 +773,48 @@ class AWSMatchmakingAnalyzer:
             # Create output directory
             os.makedirs(output_dir, exist_ok=True)
             
-            # Process each record
+            # Process each record; located logs are analyzed together once every download is done.
+            # Records are located concurrently, but records sharing a registration ID reuse the same
+            # local paths, so each registration's records are handled in order by a single task
             total_records = len(df)
-            successful_analyses = 0
-            
+            registration_rows = {}
             for index, row in df.iterrows():
                 registration_id = str(row['registrationId']).strip()
                 created_at = str(row['created_at']).strip()
+                registration_rows.setdefault(registration_id, []).append((index, created_at))
+            
+            located_by_row = {}
+            max_workers = self.config['max_parallel_downloads']
+            with ThreadPoolExecutor(max_workers=max_workers) as row_pool:
+                tasks = [
+                    row_pool.submit(self._locate_registration_logs, registration_id, rows, total_records, output_dir)
+                    for registration_id, rows in registration_rows.items()
+                ]
+                for task in as_completed(tasks):
+                    located_by_row.update(task.result())
+            
+            # Keep CSV order so results and reports come out as they would from a serial run
+            located_logs = []
+            cache_keys = []
+            for index in df.index:
+                if located_by_row.get(index) is not None:
+                    registration_id, log_file_path, cache_key = located_by_row[index]
+                    located_logs.append((registration_id, log_file_path))
+                    cache_keys.append(cache_key)
+            successful_analyses = len(located_logs)
+            
+            # Analyze the located log files (CPU bound, so in parallel across processes), reusing
+            # results cached by earlier runs on the same S3 objects
+            analysis_results = self._analyze_logs_with_cache(located_logs, cache_keys, output_dir)
+            for (registration_id, log_file_path), analysis_result in zip(located_logs, analysis_results):
+                self.analysis_results.append(analysis_result)
                 
-                logger.info(f"🔄 Processing {index + 1}/{total_records}: {registration_id}")
-                
+                # Save individual analysis result
                 try:
-                    # Convert GMT to IST
-                    ist_datetime = self.gmt_to_ist(created_at)
-                    
-                    # Construct S3 path
-                    s3_prefix = self.construct_s3_path(ist_datetime)
-                    
-                    # List S3 objects
-                    s3_objects = self.list_s3_objects(s3_prefix)
-                    
-                    if not s3_objects:
-                        logger.warning(f"⚠️ No log files found for {registration_id} on {ist_datetime.date()}")
-                        continue
-                    
-                    # Find potential log files
-                    potential_files = self.find_log_file_for_registration(registration_id, s3_objects)
-                    
-                    if not potential_files:
-                        logger.warning(f"⚠️ No potential log files found for {registration_id}")
-                        continue
-                    
-                    # Download and analyze each potential file
-                    log_found = False
-                    for s3_key in potential_files:
-                        # Create local file path
-                        local_filename = os.path.basename(s3_key)
-                        local_zip_path = os.path.join(output_dir, f"{registration_id}_{local_filename}")
-                        
-                        # Download file
-                        if self.download_s3_file(s3_key, local_zip_path):
-                            # Extract zip file
-                            extract_dir = os.path.join(output_dir, f"{registration_id}_extracted")
-                            extracted_files = self.extract_zip_file(local_zip_path, extract_dir)
-                            
-                            # Search for registration ID in extracted files
-                            for extracted_file in extracted_files:
-                                if self.search_registration_in_file(extracted_file, registration_id):
-                                    logger.info(f"🎯 Found registration {registration_id} in {extracted_file}")
-                                    
-                                    # Analyze the log file
-                                    analysis_result = self.analyze_log_with_cursor_rule(extracted_file, registration_id)
-                                    self.analysis_results.append(analysis_result)
-                                    
-                                    # Save individual analysis result
-                                    result_file = os.path.join(output_dir, f"{registration_id}_analysis.json")
-                                    with open(result_file, 'w') as f:
-                                        json.dump(analysis_result, f, indent=2)
-                                    
-                                    log_found = True
-                                    successful_analyses += 1
-                                    break
-                            
-                            if log_found:
-                                break
-                            
-                            # Clean up zip file based on configuration secrets
-                            if self.config['cleanup_temp_files']:
-                                try:
-                                    os.remove(local_zip_path)
-                                    logger.debug(f"🧹 Cleaned up temporary file: {local_zip_path}")
-                                except Exception as e:
-                                    logger.warning(f"⚠️ Failed to cleanup {local_zip_path}: {e}")
-                            else:
-                                logger.debug(f"📁 Keeping temporary file: {local_zip_path} (cleanup disabled)")
-                    
-                    # Clean up extracted directories if configured
-                    if not log_found and self.config['cleanup_temp_files']:
-                        extract_dir = os.path.join(output_dir, f"{registration_id}_extracted")
-                        if os.path.exists(extract_dir):
-                            try:
-                                import shutil
-                                shutil.rmtree(extract_dir)
-                                logger.debug(f"🧹 Cleaned up extracted directory: {extract_dir}")
-                            except Exception as e:
-                                logger.warning(f"⚠️ Failed to cleanup {extract_dir}: {e}")
-                    
-                    if not log_found:
-                        logger.warning(f"⚠️ Registration ID {registration_id} not found in any log files")
-                        
+                    result_file = os.path.join(output_dir, f"{registration_id}_analysis.json")
+                    _write_json_report(result_file, analysis_result)
                 except Exception as e:
-                    logger.error(f"❌ Error processing {registration_id}: {e}")
-                    continue
+                    logger.error(f"❌ Error saving analysis for {registration_id}: {e}")
             
             # Generate summary report
             self._generate_summary_report(output_dir, total_records, successful_analyses)
@@ -796,6 +824,196 @@ class AWSMatchmakingAnalyzer:
             logger.error(f"❌ Error processing CSV file: {e}")
             raise
     
+    def _locate_registration_logs(self, registration_id: str, rows: List[Tuple[int, str]], total_records: int,
+                                  output_dir: str) -> Dict[int, Optional[Tuple[str, str, Optional[str]]]]:
+        """
+        Locate the log file for each CSV record of one registration, one record at a time
+        
+        Args:
+            registration_id: Registration ID shared by the records
+            rows: (row index, created_at) of each record, in CSV order
+            total_records: Number of records in the CSV, for progress logging
+            output_dir: Output directory for downloads and extracted logs
+            
+        Returns:
+            Row index -> (registration ID, extracted log path, analysis cache key), or None when not found
+        """
+        located = {}
+        for index, created_at in rows:
+            logger.info(f"🔄 Processing {index + 1}/{total_records}: {registration_id}")
+            located_log = self._locate_registration_log(registration_id, created_at, output_dir)
+            located[index] = (registration_id, *located_log) if located_log else None
+        return located
+    
+    def _locate_registration_log(self, registration_id: str, created_at: str, output_dir: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Find, download and extract the log file for a single CSV record
+        
+        Args:
+            registration_id: Registration ID to locate
+            created_at: Record creation time in GMT
+            output_dir: Output directory for downloads and extracted logs
+            
+        Returns:
+            (extracted log path, analysis cache key) if found, None otherwise
+        """
+        try:
+            # Convert GMT to IST
+            ist_datetime = self.gmt_to_ist(created_at)
+            
+            # Construct S3 path
+            s3_prefix = self.construct_s3_path(ist_datetime)
+            
+            # List S3 objects
+            s3_objects = self.list_s3_objects(s3_prefix)
+            
+            if not s3_objects:
+                logger.warning(f"⚠️ No log files found for {registration_id} on {ist_datetime.date()}")
+                return None
+            
+            # Find potential log files
+            potential_files = self.find_log_file_for_registration(registration_id, s3_objects)
+            
+            if not potential_files:
+                logger.warning(f"⚠️ No potential log files found for {registration_id}")
+                return None
+            
+            # Download and search the potential files in listing order, stopping at the first match.
+            # Records already run in parallel, so each one fetches a single file at a time and the
+            # connection pool stays sized to max_parallel_downloads transfers
+            located_log = None
+            for s3_key in potential_files:
+                local_filename = os.path.basename(s3_key)
+                local_zip_path = os.path.join(output_dir, f"{registration_id}_{local_filename}")
+                if not self.download_s3_file(s3_key, local_zip_path):
+                    continue
+                
+                # Search the zip members in place and extract only the one that matches
+                extract_dir = os.path.join(output_dir, f"{registration_id}_extracted")
+                extracted_file = self.extract_registration_log(local_zip_path, extract_dir, registration_id)
+                
+                if extracted_file:
+                    logger.info(f"🎯 Found registration {registration_id} in {extracted_file}")
+                    located_log = (extracted_file, self._analysis_cache_key(s3_key, os.path.relpath(extracted_file, extract_dir), registration_id))
+                    break
+                
+                # Clean up zip file based on configuration secrets
+                self._cleanup_zip_file(local_zip_path)
+            
+            # Clean up extracted directories if configured
+            if located_log is None and self.config['cleanup_temp_files']:
+                extract_dir = os.path.join(output_dir, f"{registration_id}_extracted")
+                if os.path.exists(extract_dir):
+                    try:
+                        shutil.rmtree(extract_dir)
+                        logger.debug(f"🧹 Cleaned up extracted directory: {extract_dir}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Failed to cleanup {extract_dir}: {e}")
+            
+            if located_log is None:
+                logger.warning(f"⚠️ Registration ID {registration_id} not found in any log files")
+            return located_log
+                
+        except Exception as e:
+            logger.error(f"❌ Error processing {registration_id}: {e}")
+            return None
+    
+    def _analysis_cache_key(self, s3_key: str, member_name: str, registration_id: str) -> Optional[str]:
+        """
+        Cache key for one registration in one ZIP member under the current ANALYSIS_CACHE_VERSION;
+        the ETag changes whenever the S3 object does
+        
+        Returns:
+            Key string, or None if the object's ETag is unknown (the result is then never cached)
+        """
+        etag = self._object_etags.get(s3_key)
+        if etag is None:
+            return None
+        return json.dumps([ANALYSIS_CACHE_VERSION, s3_key, etag, member_name, registration_id])
+    
+    def _analyze_logs_with_cache(self, located_logs: List[Tuple[str, str]], cache_keys: List[Optional[str]], output_dir: str) -> List[Dict]:
+        """
+        Analyze located logs, skipping those already analyzed by an earlier run (sqlite cache in output_dir)
+        Cached results older than ANALYSIS_CACHE_TTL_DAYS are pruned whenever the cache is opened, which
+        bounds analysis_cache.db to the registrations analyzed within that window (<= 0 keeps them forever)
+        
+        Args:
+            located_logs: (registration_id, log_file_path) pairs
+            cache_keys: Cache key for each located log (None = not cacheable)
+            output_dir: Output directory holding analysis_cache.db
+            
+        Returns:
+            Analysis results in the same order as located_logs
+        """
+        if not self.config['enable_analysis_cache'] or not located_logs:
+            return self._analyze_logs(located_logs)
+        
+        try:
+            cache = sqlite3.connect(os.path.join(output_dir, 'analysis_cache.db'))
+            cache.execute("CREATE TABLE IF NOT EXISTS analysis_results (key TEXT PRIMARY KEY, result TEXT NOT NULL, cached_at REAL NOT NULL)")
+            ttl_days = self.config['analysis_cache_ttl_days']
+            if ttl_days > 0:
+                cache.execute("DELETE FROM analysis_results WHERE cached_at < ?", (time.time() - ttl_days * 86400,))
+            cache.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Analysis cache unavailable, analyzing every log: {e}")
+            return self._analyze_logs(located_logs)
+        
+        try:
+            results = [None] * len(located_logs)
+            for index, cache_key in enumerate(cache_keys):
+                if cache_key is None:
+                    continue
+                row = cache.execute("SELECT result FROM analysis_results WHERE key = ?", (cache_key,)).fetchone()
+                if row is not None:
+                    results[index] = json.loads(row[0])
+                    results[index]["log_file"] = located_logs[index][1]
+            
+            misses = [index for index, result in enumerate(results) if result is None]
+            logger.info(f"♻️ Reusing {len(located_logs) - len(misses)} cached analyses, analyzing {len(misses)} logs")
+            
+            for index, analysis_result in zip(misses, self._analyze_logs([located_logs[index] for index in misses])):
+                results[index] = analysis_result
+                # Failed analyses are retried on the next run rather than cached
+                if cache_keys[index] is not None and "error" not in analysis_result:
+                    cache.execute(
+                        "INSERT OR REPLACE INTO analysis_results (key, result, cached_at) VALUES (?, ?, ?)",
+                        (cache_keys[index], json.dumps(analysis_result), time.time())
+                    )
+            cache.commit()
+            return results
+        finally:
+            cache.close()
+    
+    def _analyze_logs(self, located_logs: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Run the cursor rule analysis over every located log in a process pool
+        
+        Args:
+            located_logs: (registration_id, log_file_path) pairs
+            
+        Returns:
+            Analysis results in the same order as located_logs
+        """
+        if len(located_logs) <= 1:
+            return [self.analyze_log_with_cursor_rule(log_file_path, registration_id)
+                    for registration_id, log_file_path in located_logs]
+        
+        max_workers = min(os.cpu_count() or 1, len(located_logs))
+        # Hand logs out in batches so per-task IPC doesn't dominate on small files
+        chunksize = max(1, len(located_logs) // (max_workers * 4))
+        logger.debug(f"🚀 Using {max_workers} worker processes to analyze {len(located_logs)} logs")
+        
+        registration_ids = [registration_id for registration_id, _ in located_logs]
+        log_file_paths = [log_file_path for _, log_file_path in located_logs]
+        with log_process_pool(max_workers) as executor:
+            return list(executor.map(
+                AWSMatchmakingAnalyzer.analyze_log_with_cursor_rule,
+                log_file_paths,
+                registration_ids,
+                chunksize=chunksize
+            ))
+    
     def _generate_summary_report(self, output_dir: str, total_records: int, successful_analyses: int) -> None:
         """Generate summary report of all analyses"""
         try:
@@ -829,8 +1047,7 @@ class AWSMatchmakingAnalyzer:
             
             # Save summary report
             summary_file = os.path.join(output_dir, "analysis_summary.json")
-            with open(summary_file, 'w') as f:
-                json.dump(summary, f, indent=2)
+            _write_json_report(summary_file, summary)
             
             # Generate readable report
             readable_report = self._generate_readable_report(summary)
@@ -0,0 +1,242 @@
+"""
+Gameplay Log Phase Scanner
+
+Shared by Analyzer_Automated.py and automated_matchmaking_analyzer.py: both diagnose a registration
+with the same cursor rule phases, and every check those phases make is resolved here from a single
+tokenizing pass over the log.
+"""
+
+import os
+import re
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import ahocorasick  # Optional (pyahocorasick): classifies every phase marker in one automaton pass
+except ImportError:
+    ahocorasick = None
+
+# Read size used when classifying log lines with the Aho-Corasick automaton
+LOG_SCAN_BLOCK_SIZE = 1 << 20
+
+# Phase markers, all plain literals. None of them embed the registration ID: it is looked up
+# as a literal after the marker, so no pattern is ever built per registration
+PHASE_MARKERS: Dict[str, bytes] = {
+    'register_request': b'API New Request: /v1.0/super/tournament/registerTournament',
+    'register_success': b'API Success: /v1.0/super/tournament/registerTournament',
+    'details_request': b'API New Request: /v1.0/super/tournament/getTournamentDetails',
+    'details_success': b'API Success: /v1.0/super/tournament/getTournamentDetails',
+    'socket_url': b'Socket url-',
+    'socket_connected': b'Socket connected with id-',
+    'socket_failed': b'Socket connection failed-',
+    'gameplay_event': b'eventHandler gameplay socket event-',
+    'lobby_timeout': b'backToLobbyInterval Timer expired',
+    'success_flag': b'"success":true',
+    'gameplay_server': b'"gameplayServer":{',
+    'queue_finding': b'"state":"FINDING"',
+    'round_starting': b'"en":"ROUND_STARTING"',
+    'match_failed': b'"en":"MATCH_MAKING_FAILED"',
+}
+
+# One alternation over every marker, compiled once, so a log is tokenized in a single regex pass
+_PHASE_EVENT_PATTERN = re.compile(b'|'.join(
+    b'(?P<%s>%s)' % (name.encode(), re.escape(marker)) for name, marker in PHASE_MARKERS.items()
+))
+
+def _build_phase_marker_automaton():
+    """Build an Aho-Corasick automaton over the phase markers, or None without pyahocorasick"""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for name, marker in PHASE_MARKERS.items():
+        automaton.add_word(marker.decode('latin-1'), name)
+    automaton.make_automaton()
+    return automaton
+
+# Same marker set as the alternation above, classified in one linear automaton pass when available
+_PHASE_MARKER_AUTOMATON = _build_phase_marker_automaton()
+_PHASE_MARKER_OVERLAP = max(len(marker) for marker in PHASE_MARKERS.values()) - 1
+
+# Markers whose registration ID only counts when it is on the marker's own line
+_LINE_SCOPED_MARKERS = ('socket_url', 'socket_failed')
+
+# Matchmaking events, which count when they follow the registration ID on a gameplay event line
+_GAMEPLAY_EVENT_MARKERS = ('queue_finding', 'round_starting', 'match_failed')
+
+# Matchmaking lifecycle of a registration, walked over its events in log order: state -> {event: next state}.
+# Events without a transition from the current state are ignored, so an outcome only counts once the user
+# is in the queue, a round that has started stays started whatever a later retry reports, and a failed
+# attempt is superseded by a later round start or a new queue entry
+_MATCHMAKING_TRANSITIONS = {
+    None: {'queue_finding': 'queued'},
+    'queued': {'queue_finding': 'queued', 'round_starting': 'round_starting', 'match_failed': 'match_failed', 'lobby_timeout': 'lobby_timeout'},
+    'match_failed': {'queue_finding': 'queued', 'round_starting': 'round_starting'},
+    'lobby_timeout': {'queue_finding': 'queued'},
+    'round_starting': {},
+}
+
+# Detail fields, read only at the markers that introduce them
+_ENTRY_FEE_PATTERN = re.compile(rb'"entryFee":([0-9.]+)')
+_GAMEPLAY_SERVER_PATTERN = re.compile(rb'"gameplayServer":\{[^}]*"gameId":"([^"]+)"[^}]*"podip":"([^"]+)"[^}]*\}')
+
+# The only fact needed that does not depend on the registration ID, for logs that never mention it
+_REGISTER_REQUEST_PATTERN = re.compile(re.escape(PHASE_MARKERS['register_request']))
+_REGISTRATION_EVENTS = (
+    "register_success", "details_request", "table_assigned", "socket_attempt", "socket_connected",
+    "socket_failed", "queue_entered", "match_failed", "round_starting", "lobby_timeout"
+)
+
+def registration_needle(registration_id: str) -> bytes:
+    """The JSON field that ties a log entry to a registration"""
+    return f'"registrationId":"{registration_id}"'.encode()
+
+@contextmanager
+def map_log_file(log_file_path: str):
+    """Memory-map a log file read-only so it is scanned as bytes from the page cache instead of a decoded str copy"""
+    with open(log_file_path, 'rb') as f:
+        # Zero-length files cannot be mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as log_content:
+            yield log_content
+
+def log_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for the CPU-bound log work (ZIP searches and phase scans)
+    Workers start from a fork server where the platform has one rather than being forked from the analyzer
+    itself, which by then runs S3 transfer, connection pool and report writer threads; forking a process with
+    live threads can deadlock the child. Elsewhere the platform default start method is used
+    """
+    start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else None
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(start_method))
+
+def iter_phase_markers(log_content: bytes):
+    """Yield (marker kind, start offset, end offset) for every phase marker in the log, in order"""
+    if _PHASE_MARKER_AUTOMATON is None:
+        for match in _PHASE_EVENT_PATTERN.finditer(log_content):
+            yield match.lastgroup, match.start(), match.end()
+        return
+    
+    # The automaton works on str, so the log is decoded block by block (latin-1 keeps offsets 1:1)
+    # with enough overlap that a marker straddling two blocks is still seen, and reported once
+    size = len(log_content)
+    for block_start in range(0, size, LOG_SCAN_BLOCK_SIZE):
+        window_start = max(0, block_start - _PHASE_MARKER_OVERLAP)
+        window = str(log_content[window_start:block_start + LOG_SCAN_BLOCK_SIZE], 'latin-1')
+        for end_index, kind in _PHASE_MARKER_AUTOMATON.iter(window):
+            end = window_start + end_index + 1
+            if end > block_start:
+                yield kind, end - len(PHASE_MARKERS[kind]), end
+
+def scan_phase_events(log_content: bytes, registration_id: str) -> Dict:
+    """
+    Tokenize a log in one pass over the phase markers and resolve every phase check from it
+    A check passes when the registration ID (then the status, if any) follows the first marker of its kind;
+    socket checks, matchmaking events and the entry fee need the ID on the same line as the marker.
+    The matchmaking outcome is the state those events reach in log order, see _MATCHMAKING_TRANSITIONS
+    """
+    needle = registration_needle(registration_id)
+    
+    # Fast rejection: every ID-bound check fails if the ID never appears, which a single substring
+    # search settles without tokenizing the log. The lobby timeout and details are only read once
+    # an ID-bound check has passed, so the register request count is all that is left to find
+    if log_content.find(needle) == -1:
+        events = dict.fromkeys(_REGISTRATION_EVENTS, False)
+        events.update(
+            register_requests=sum(1 for _ in _REGISTER_REQUEST_PATTERN.finditer(log_content)),
+            socket_connections=0,
+            matchmaking_state=None,
+            entry_fee=None,
+            game_server=None,
+        )
+        return events
+    
+    first_marker_end = {}
+    register_requests = 0
+    socket_connections = 0
+    connected_line_end = -1
+    line_hits = dict.fromkeys(_LINE_SCOPED_MARKERS, False)
+    queue_entered = False
+    matchmaking_state = None
+    gameplay_marker_end = -1
+    gameplay_line_end = -1
+    entry_fee = None
+    game_server = None
+    
+    def line_end_after(position: int) -> int:
+        line_end = log_content.find(b'\n', position)
+        return len(log_content) if line_end == -1 else line_end
+    
+    for kind, marker_start, marker_end in iter_phase_markers(log_content):
+        if kind == 'register_request':
+            register_requests += 1
+        elif kind == 'socket_connected':
+            # Connections are counted per line: later markers on an already counted line are skipped
+            if marker_start > connected_line_end:
+                connected_line_end = line_end_after(marker_end)
+                if log_content.find(needle, marker_end, connected_line_end) != -1:
+                    socket_connections += 1
+        elif kind == 'gameplay_event':
+            # Only the first gameplay marker of a line matters: the ID and event must come after it
+            if marker_start > gameplay_line_end:
+                gameplay_marker_end = marker_end
+                gameplay_line_end = line_end_after(marker_end)
+        elif kind in _GAMEPLAY_EVENT_MARKERS:
+            transitions = _MATCHMAKING_TRANSITIONS[matchmaking_state]
+            if (kind in transitions and marker_start < gameplay_line_end
+                    and log_content.find(needle, gameplay_marker_end, marker_start) != -1):
+                matchmaking_state = transitions[kind]
+                queue_entered = True
+        elif kind == 'lobby_timeout':
+            matchmaking_state = _MATCHMAKING_TRANSITIONS[matchmaking_state].get(kind, matchmaking_state)
+        elif kind in line_hits:
+            if not line_hits[kind]:
+                line_hits[kind] = log_content.find(needle, marker_end, line_end_after(marker_end)) != -1
+        elif kind == 'success_flag':
+            # Entry fee: the last one after the ID on the first success line carrying the ID
+            if entry_fee is None:
+                line_end = line_end_after(marker_end)
+                position = log_content.find(needle, marker_end, line_end)
+                if position != -1:
+                    for fee_match in _ENTRY_FEE_PATTERN.finditer(log_content, position + len(needle), line_end):
+                        entry_fee = fee_match.group(1)
+        elif kind == 'gameplay_server':
+            if game_server is None:
+                server_match = _GAMEPLAY_SERVER_PATTERN.match(log_content, marker_start)
+                if server_match:
+                    game_server = tuple(value.decode('utf-8', errors='ignore') for value in server_match.groups())
+        first_marker_end.setdefault(kind, marker_end)
+    
+    def followed_by(kind: str, *needles: bytes) -> bool:
+        position = first_marker_end.get(kind)
+        if position is None:
+            return False
+        for expected in needles:
+            position = log_content.find(expected, position)
+            if position == -1:
+                return False
+            position += len(expected)
+        return True
+    
+    return {
+        "register_requests": register_requests,
+        "register_success": followed_by('register_success', needle),
+        "entry_fee": entry_fee,
+        "details_request": followed_by('details_request', needle),
+        "table_assigned": followed_by('details_success', needle, b'"registrationStatus":"TABLE_ASSIGNED"'),
+        "game_server": game_server,
+        "socket_attempt": line_hits['socket_url'],
+        "socket_connected": socket_connections > 0,
+        "socket_connections": socket_connections,
+        "socket_failed": line_hits['socket_failed'],
+        "queue_entered": queue_entered,
+        "matchmaking_state": matchmaking_state,
+        "match_failed": matchmaking_state == 'match_failed',
+        "round_starting": matchmaking_state == 'round_starting',
+        "lobby_timeout": matchmaking_state == 'lobby_timeout',
+    }
@@ -8,13 +8,29 @@ where gameid in ('value1', 'value2', ...) and uid in ('value1', 'value2', ...);
 
 import pandas as pd
 import sys
+from typing import Union
 
-def generate_athena_query(csv_file: str, output_file: str = None) -> str:
+def format_sql_in_list(values) -> str:
+    """
+    Format values as a SQL IN list, quoting each one and escaping embedded single quotes.
+    """
+    return "(" + ", ".join("'" + str(value).replace("'", "''") + "'" for value in values) + ")"
+
+ID_COLUMNS = ('game_id', 'user_id')
+
+def read_id_columns(csv_file: str) -> pd.DataFrame:
+    """
+    Read only the ID columns of the CSV, parsed straight into Arrow-backed strings.
+    Other columns are skipped by the parser; a missing ID column is simply absent from the result.
+    """
+    return pd.read_csv(csv_file, usecols=lambda column: column in ID_COLUMNS, dtype='string[pyarrow]')
+
+def generate_athena_query(source: Union[str, pd.DataFrame], output_file: str = None) -> str:
     """
     Generate Athena SQL query from CSV data.
     
     Args:
-        csv_file: Path to the CSV file
+        source: Path to the CSV file, or the ID columns already read from it
         output_file: Optional path to save the query to a file
         
     Returns:
@@ -22,9 +38,12 @@ def generate_athena_query(csv_file: str, output_file: str = None) -> str:
     """
     
     try:
-        # Read the CSV file
-        print(f"Reading CSV file: {csv_file}")
-        df = pd.read_csv(csv_file)
+        if isinstance(source, pd.DataFrame):
+            df = source
+        else:
+            # Read the CSV file
+            print(f"Reading CSV file: {source}")
+            df = read_id_columns(source)
         print(f"Loaded {len(df)} records")
         
         # Check if required columns exist
@@ -43,12 +62,10 @@ def generate_athena_query(csv_file: str, output_file: str = None) -> str:
         print(f"Found {len(unique_user_ids)} unique user_ids")
         
         # Format game_ids for SQL IN clause
-        game_ids_formatted = "', '".join(unique_game_ids)
-        game_ids_sql = f"('{game_ids_formatted}')"
+        game_ids_sql = format_sql_in_list(unique_game_ids)
         
         # Format user_ids for SQL IN clause  
-        user_ids_formatted = "', '".join(unique_user_ids)
-        user_ids_sql = f"('{user_ids_formatted}')"
+        user_ids_sql = format_sql_in_list(unique_user_ids)
         
         # Generate the SQL query
         sql_query = f"""select gameid, uid, appversion 
@@ -82,25 +99,26 @@ and uid in {user_ids_sql};"""
         return sql_query
         
     except FileNotFoundError:
-        print(f"Error: File '{csv_file}' not found")
+        print(f"Error: File '{source}' not found")
         return None
     except Exception as e:
         print(f"Error processing file: {str(e)}")
         return None
 
-def generate_compact_query(csv_file: str) -> str:
+def generate_compact_query(source: Union[str, pd.DataFrame]) -> str:
     """
     Generate a more compact version of the query (single line).
+    Accepts the CSV path or the ID columns already read from it.
     """
     try:
-        df = pd.read_csv(csv_file)
+        df = source if isinstance(source, pd.DataFrame) else read_id_columns(source)
         unique_game_ids = df['game_id'].dropna().unique().tolist()
         unique_user_ids = df['user_id'].dropna().unique().tolist()
         
-        game_ids_formatted = "', '".join(unique_game_ids)
-        user_ids_formatted = "', '".join(unique_user_ids)
+        game_ids_sql = format_sql_in_list(unique_game_ids)
+        user_ids_sql = format_sql_in_list(unique_user_ids)
         
-        compact_query = f"select gameid, uid, appversion from mongo_rummy.registrations_vw where gameid in ('{game_ids_formatted}') and uid in ('{user_ids_formatted}');"
+        compact_query = f"select gameid, uid, appversion from mongo_rummy.registrations_vw where gameid in {game_ids_sql} and uid in {user_ids_sql};"
         
         return compact_query
     except Exception as e:
@@ -116,14 +134,27 @@ def main():
     print("Generating Athena SQL Query from CSV data...")
     print("-" * 50)
     
+    # Read the ID columns once; both query formats are built from the same frame
+    print(f"Reading CSV file: {csv_file}")
+    try:
+        id_columns = read_id_columns(csv_file)
+    except FileNotFoundError:
+        print(f"Error: File '{csv_file}' not found")
+        print("\n❌ Failed to generate query.")
+        return
+    except Exception as e:
+        print(f"Error processing file: {str(e)}")
+        print("\n❌ Failed to generate query.")
+        return
+    
     # Generate the formatted query
-    query = generate_athena_query(csv_file, output_file)
+    query = generate_athena_query(id_columns, output_file)
     
     if query:
         print("\n" + "="*80)
         print("COMPACT VERSION (SINGLE LINE):")
         print("="*80)
-        compact = generate_compact_query(csv_file)
+        compact = generate_compact_query(id_columns)
         if compact:
             print(compact)
         
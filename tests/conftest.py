@@ -0,0 +1,11 @@
+import os
+import sys
+
+# The analyzers are standalone scripts rather than a package, so make both script directories importable
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for script_dir in (REPO_ROOT, os.path.join(REPO_ROOT, 'Automated Script')):
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+
+# Importing the analyzers sets up their log file; keep test runs from writing one into the working directory
+os.environ.setdefault('LOG_FILE_PATH', os.devnull)
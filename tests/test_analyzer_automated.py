@@ -0,0 +1,253 @@
+import io
+import json
+import pickle
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import pytest
+
+import Analyzer_Automated
+from Analyzer_Automated import (
+    AthenaToAWSAnalyzer, PhaseResult, _build_registration_matcher, _find_registrations_in_member, _report_default,
+    _write_json_report,
+)
+
+from test_log_phase_scanner import (
+    DETAILS_SUCCESS, FINDING, LOBBY_TIMEOUT, MATCH_FAILED, REGISTER_REQUEST, RID, ROUND_STARTING, SOCKET_CONNECTED,
+    SOCKET_FAILED, SOCKET_URL, SUCCESSFUL_LOG, gameplay, log,
+)
+
+
+def analyze(tmp_path, content: bytes):
+    log_file = tmp_path / 'registration.log'
+    log_file.write_bytes(content)
+    return AthenaToAWSAnalyzer._analyze_single_log_with_cursor_rule(str(log_file), RID)
+
+
+def analyzer():
+    """An analyzer without AWS clients, for the methods that only need configuration"""
+    instance = AthenaToAWSAnalyzer.__new__(AthenaToAWSAnalyzer)
+    instance._ist_delta = timedelta(hours=5, minutes=30)
+    return instance
+
+
+def zip_member(content: bytes) -> zipfile.ZipFile:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr('app.log', content)
+    return zipfile.ZipFile(buffer)
+
+
+@pytest.mark.parametrize('use_matcher', [False, True])
+def test_registration_ids_split_across_zip_blocks_are_found(monkeypatch, use_matcher):
+    pending = {registration_id: registration_id.encode() for registration_id in ('reg-1', 'reg-22', 'reg-333')}
+    matcher = _build_registration_matcher(pending) if use_matcher else None
+    if use_matcher and matcher is None:
+        pytest.skip('pyahocorasick is not installed')
+    overlap = max(len(needle) for needle in pending.values()) - 1
+    monkeypatch.setattr(Analyzer_Automated, 'ZIP_SCAN_BLOCK_SIZE', 4)
+
+    with zip_member(b'xx reg-1 yyy reg-333 z') as zip_ref:
+        found = _find_registrations_in_member(zip_ref, zip_ref.infolist()[0], pending, overlap, matcher)
+
+    assert sorted(found) == ['reg-1', 'reg-333']
+
+
+def write_zip(path, **members: bytes):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zip_ref:
+        for name, content in members.items():
+            zip_ref.writestr(name, content)
+    return path
+
+
+def process_zips(monkeypatch, tmp_path, registrations_by_zip):
+    # Threads instead of worker processes, so the test's monkeypatches apply to the search
+    monkeypatch.setattr(Analyzer_Automated, 'log_process_pool', lambda max_workers: ThreadPoolExecutor(max_workers))
+    instance = analyzer()
+    instance.logs_files_dir = tmp_path
+    return instance._process_zips(registrations_by_zip)
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_registration_found_in_several_zips_gets_the_first_listed_one(monkeypatch, tmp_path, reverse):
+    first = write_zip(tmp_path / 'cache_a.zip', **{'app.log': b'reg-1 from a'})
+    second = write_zip(tmp_path / 'cache_b.zip', **{'app.log': b'reg-1 from b', 'other.log': b'reg-2'})
+    listing = [(second, ['reg-1', 'reg-2']), (first, ['reg-1'])] if reverse else [(first, ['reg-1']), (second, ['reg-1', 'reg-2'])]
+
+    log_files = process_zips(monkeypatch, tmp_path, dict(listing))
+
+    assert sorted(log_files) == ['reg-1', 'reg-2']
+    assert (tmp_path / 'reg-1_logs.log').read_bytes() == (b'reg-1 from b' if reverse else b'reg-1 from a')
+    assert (tmp_path / 'reg-2_logs.log').read_bytes() == b'reg-2'
+
+
+def test_failed_extraction_leaves_no_partial_log(monkeypatch, tmp_path):
+    corrupted = write_zip(tmp_path / 'cache_a.zip', **{'app.log': b'reg-1' + b'x' * 65536})
+    # Corrupt the end of the member: the search stops once it has read the ID, but the copy reads on and fails its CRC
+    data = bytearray(corrupted.read_bytes())
+    data[data.index(b'reg-1') + 65536] ^= 0xff
+    corrupted.write_bytes(bytes(data))
+    monkeypatch.setattr(Analyzer_Automated, 'ZIP_SCAN_BLOCK_SIZE', 8)
+
+    assert process_zips(monkeypatch, tmp_path, {corrupted: ['reg-1']}) == {}
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['cache_a.zip']
+
+    fallback = write_zip(tmp_path / 'cache_b.zip', **{'app.log': b'reg-1 from b'})
+    log_files = process_zips(monkeypatch, tmp_path, {corrupted: ['reg-1'], fallback: ['reg-1']})
+
+    assert (tmp_path / 'reg-1_logs.log').read_bytes() == b'reg-1 from b'
+    assert log_files == {'reg-1': str(tmp_path / 'reg-1_logs.log')}
+
+
+def test_window_queries_split_the_range_by_day():
+    query = "SELECT 1 WHERE t >= '{window_start}' AND t < '{window_end}'"
+    queries = analyzer()._build_window_queries(query, datetime(2025, 7, 1, 6), datetime(2025, 7, 3, 0))
+
+    assert queries == [
+        "SELECT 1 WHERE t >= '2025-07-01 06:00:00' AND t < '2025-07-02 06:00:00'",
+        "SELECT 1 WHERE t >= '2025-07-02 06:00:00' AND t < '2025-07-03 00:00:00'",
+    ]
+
+
+@pytest.mark.parametrize('query, end', [
+    ("SELECT 1", datetime(2025, 7, 5)),
+    ("SELECT 1 WHERE t >= '{window_start}' AND t < '{window_end}'", datetime(2025, 7, 1, 12)),
+])
+def test_window_queries_run_once_without_placeholders_or_for_a_single_day(query, end):
+    queries = analyzer()._build_window_queries(query, datetime(2025, 7, 1), end)
+
+    assert len(queries) == 1
+    assert '{window' not in queries[0]
+
+
+def test_s3_day_prefixes_use_the_ist_day():
+    prefixes = analyzer()._s3_day_prefixes(['2025-07-01T10:00:00', '2025-07-01T19:00:00'])
+
+    assert prefixes == {
+        '2025-07-01T10:00:00': 'rummy_gameplay_logs/2025/07/01/',
+        '2025-07-01T19:00:00': 'rummy_gameplay_logs/2025/07/02/',
+    }
+
+
+def test_s3_day_prefixes_handle_mixed_timestamp_formats():
+    prefixes = analyzer()._s3_day_prefixes(['2025-07-01T19:00:00', '2025-07-01T10:00:00Z'])
+
+    assert prefixes['2025-07-01T19:00:00'] == 'rummy_gameplay_logs/2025/07/02/'
+    assert prefixes['2025-07-01T10:00:00Z'] == 'rummy_gameplay_logs/2025/07/01/'
+
+
+def test_zip_listing_walks_every_page_once_per_prefix():
+    instance = analyzer()
+    instance.config = {'aws_s3_bucket': 'logs'}
+    instance._prefix_listing_cache = {}
+    instance._prefix_listing_lock = threading.Lock()
+    instance.s3_client = mock.Mock()
+    paginate = instance.s3_client.get_paginator.return_value.paginate
+    paginate.return_value = [
+        {'Contents': [{'Key': 'day/a.zip'}, {'Key': 'day/readme.txt'}]},
+        {'Contents': [{'Key': 'day/b.zip'}]},
+        {},
+    ]
+
+    assert instance._list_zip_files('day/') == ['day/a.zip', 'day/b.zip']
+    assert instance._list_zip_files('day/') == ['day/a.zip', 'day/b.zip']
+    paginate.assert_called_once_with(Bucket='logs', Prefix='day/')
+
+
+@pytest.mark.parametrize('content, failure_point, failure_type', [
+    (SUCCESSFUL_LOG, 'NO_FAILURE', 'SUCCESS'),
+    (log(REGISTER_REQUEST), 'REGISTRATION', 'REGISTRATION_FAILURE'),
+    (SUCCESSFUL_LOG.replace(DETAILS_SUCCESS, b''), 'TABLE_ASSIGNMENT', 'ALLOCATION_FAILURE'),
+    (SUCCESSFUL_LOG.replace(SOCKET_CONNECTED, SOCKET_FAILED), 'SOCKET_CONNECTION', 'NETWORK_FAILURE'),
+])
+def test_failure_point_is_the_first_failing_phase(tmp_path, content, failure_point, failure_type):
+    result = analyze(tmp_path, content)
+
+    assert (result['failure_point'], result['failure_type']) == (failure_point, failure_type)
+
+
+@pytest.mark.parametrize('events, state, failure_point, failure_type', [
+    ((FINDING, ROUND_STARTING), 'SUCCESS', 'NO_FAILURE', 'SUCCESS'),
+    ((FINDING, MATCH_FAILED), 'FAILED', 'MATCHMAKING_LOGIC', 'SERVER_SIDE_MATCHMAKING_FAILURE'),
+    ((FINDING,), 'FAILED', 'MATCHMAKING_UNKNOWN', 'UNKNOWN_MATCHMAKING_FAILURE'),
+    ((), 'FAILED', 'QUEUE_ENTRY', 'QUEUE_ENTRY_FAILURE'),
+])
+def test_matchmaking_outcome_sets_the_failure_point(tmp_path, events, state, failure_point, failure_type):
+    content = SUCCESSFUL_LOG.split(gameplay(FINDING))[0] + log(*(gameplay(event) for event in events))
+    result = analyze(tmp_path, content)
+
+    assert result['phases']['phase4_matchmaking_lifecycle'].status == state
+    assert result['failure_point'] == failure_point
+    assert result['failure_type'] == failure_type
+
+
+def test_lobby_timeout_is_reported_as_an_unresponsive_server(tmp_path):
+    result = analyze(tmp_path, SUCCESSFUL_LOG.split(gameplay(FINDING))[0] + log(gameplay(FINDING), LOBBY_TIMEOUT))
+
+    assert result['phases']['phase4_matchmaking_lifecycle'].details['outcome'] == 'CLIENT_SIDE_TIMEOUT'
+    assert (result['failure_point'], result['failure_type']) == ('SERVER_UNRESPONSIVE', 'CLIENT_SIDE_TIMEOUT')
+
+
+def test_cursor_rule_stops_at_the_first_failing_phase(tmp_path):
+    # The socket fails, so matchmaking events later in the log are never considered
+    content = SUCCESSFUL_LOG.replace(log(SOCKET_URL, SOCKET_CONNECTED), log(SOCKET_URL, SOCKET_FAILED))
+    result = analyze(tmp_path, content)
+    phases = result['phases']
+
+    assert [phases[key].status for key in phases] == ['SUCCESS', 'SUCCESS', 'FAILED', 'NOT_REACHED']
+    assert (result['failure_point'], result['failure_type']) == ('SOCKET_CONNECTION', 'NETWORK_FAILURE')
+    assert result['all_failure_points'] == [{
+        'failure_reason': 'FAILURE_REASON_3',
+        'type': 'NETWORK_FAILURE',
+        'reason': 'Socket connection explicitly failed',
+    }]
+
+
+def test_phase_results_serialize_with_the_report_keys():
+    phases = {
+        'phase1_registration': PhaseResult(status='SUCCESS', details={'api_request_found': True}),
+        'phase4_matchmaking_lifecycle': PhaseResult(status='FAILED', failure_point='QUEUE_ENTRY', failure_type='QUEUE_ENTRY_FAILURE'),
+    }
+
+    assert json.loads(json.dumps(phases, default=_report_default)) == {
+        'phase1_registration': {'status': 'SUCCESS', 'details': {'api_request_found': True}},
+        'phase4_matchmaking_lifecycle': {
+            'status': 'FAILED', 'details': {}, 'failure_point': 'QUEUE_ENTRY', 'failure_type': 'QUEUE_ENTRY_FAILURE',
+        },
+    }
+
+
+def test_phase_results_are_slotted_and_cross_the_worker_process_boundary():
+    result = pickle.loads(pickle.dumps(PhaseResult(status='FAILED', details={'outcome': 'UNKNOWN_FAILURE'}, failure_point='QUEUE_ENTRY')))
+
+    assert not hasattr(result, '__dict__')
+    assert (result.status, result.details, result.failure_point, result.failure_type) == (
+        'FAILED', {'outcome': 'UNKNOWN_FAILURE'}, 'QUEUE_ENTRY', None,
+    )
+
+
+@pytest.mark.parametrize('use_orjson', [False, True])
+def test_json_report_is_the_same_with_and_without_orjson(monkeypatch, tmp_path, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(Analyzer_Automated, 'orjson', None)
+    elif Analyzer_Automated.orjson is None:
+        pytest.skip('orjson is not installed')
+    report = {
+        'count': np.int64(5),
+        'wait_time': float('nan'),
+        'values': [np.float32('nan'), np.bool_(True), np.float64(1.5)],
+        'phases': {'phase1_registration': PhaseResult(status='SUCCESS', details={'entry_fee': float('inf')})},
+    }
+
+    _write_json_report(tmp_path / 'report.json', report)
+
+    assert json.loads((tmp_path / 'report.json').read_text()) == {
+        'count': 5,
+        'wait_time': None,
+        'values': [None, True, 1.5],
+        'phases': {'phase1_registration': {'status': 'SUCCESS', 'details': {'entry_fee': None}}},
+    }
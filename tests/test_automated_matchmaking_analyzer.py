@@ -0,0 +1,144 @@
+import io
+import json
+import threading
+import time
+import zipfile
+from unittest import mock
+
+import pytest
+
+import automated_matchmaking_analyzer
+from automated_matchmaking_analyzer import AWSMatchmakingAnalyzer, _stream_contains
+
+from test_log_phase_scanner import (
+    DETAILS_SUCCESS, FINDING, LOBBY_TIMEOUT, MATCH_FAILED, RID, ROUND_STARTING, SUCCESSFUL_LOG, gameplay, log,
+)
+
+
+def analyze(tmp_path, content: bytes):
+    log_file = tmp_path / 'registration.log'
+    log_file.write_bytes(content)
+    return AWSMatchmakingAnalyzer.analyze_log_with_cursor_rule(str(log_file), RID)
+
+
+def test_empty_log_file_fails_at_registration(tmp_path):
+    result = analyze(tmp_path, b'')
+
+    assert 'error' not in result
+    assert (result['failure_point'], result['failure_type']) == ('REGISTRATION', 'REGISTRATION_FAILURE')
+
+
+@pytest.mark.parametrize('events, status, detail_flag, failure_point, failure_type', [
+    ((FINDING, ROUND_STARTING), 'SUCCESS', 'round_started', 'NO_FAILURE', 'SUCCESS'),
+    ((FINDING, MATCH_FAILED), 'FAILED', 'match_making_failed', 'MATCHMAKING_LOGIC', 'SERVER_SIDE_MATCHMAKING_FAILURE'),
+    ((FINDING, LOBBY_TIMEOUT), 'FAILED', 'client_timeout', 'SERVER_UNRESPONSIVE', 'CLIENT_SIDE_TIMEOUT'),
+    ((FINDING,), 'FAILED', None, 'MATCHMAKING_UNKNOWN', 'UNKNOWN_MATCHMAKING_FAILURE'),
+    ((), 'FAILED', None, 'QUEUE_ENTRY', 'QUEUE_ENTRY_FAILURE'),
+])
+def test_matchmaking_outcome_sets_the_failure_point(tmp_path, events, status, detail_flag, failure_point, failure_type):
+    lines = [event if event == LOBBY_TIMEOUT else gameplay(event) for event in events]
+    result = analyze(tmp_path, SUCCESSFUL_LOG.split(gameplay(FINDING))[0] + log(*lines))
+    phase4 = result['phases']['phase4_matchmaking_lifecycle']
+
+    assert phase4['status'] == status
+    if detail_flag is not None:
+        assert phase4['details'][detail_flag] is True
+    assert (result['failure_point'], result['failure_type']) == (failure_point, failure_type)
+
+
+def test_cursor_rule_stops_at_the_first_failing_phase(tmp_path):
+    # No table is assigned, so the later phases are left UNKNOWN even though the log would pass them
+    content = SUCCESSFUL_LOG.replace(DETAILS_SUCCESS, DETAILS_SUCCESS.replace(b'TABLE_ASSIGNED', b'WAITING'))
+    result = analyze(tmp_path, content)
+    phases = result['phases']
+
+    assert [phases[key]['status'] for key in phases] == ['SUCCESS', 'FAILED', 'UNKNOWN', 'UNKNOWN']
+    assert (result['failure_point'], result['failure_type']) == ('TABLE_ASSIGNMENT', 'ALLOCATION_FAILURE')
+
+
+def caching_analyzer():
+    """An analyzer without AWS clients whose log analysis is recorded instead of run"""
+    instance = AWSMatchmakingAnalyzer.__new__(AWSMatchmakingAnalyzer)
+    instance.config = {'enable_analysis_cache': True, 'analysis_cache_ttl_days': 30}
+    instance._analyze_logs = mock.Mock(side_effect=lambda located_logs: [
+        {'registration_id': registration_id, 'log_file': log_file_path} for registration_id, log_file_path in located_logs
+    ])
+    return instance
+
+
+def test_cached_analyses_are_reused_on_the_next_run(tmp_path):
+    instance = caching_analyzer()
+    cache_keys = ['reg-1 key', None]
+    instance._analyze_logs_with_cache([('reg-1', 'a.log'), ('reg-2', 'b.log')], cache_keys, str(tmp_path))
+
+    results = instance._analyze_logs_with_cache([('reg-1', 'c.log'), ('reg-2', 'd.log')], cache_keys, str(tmp_path))
+
+    # Only the log without a cache key is analyzed again; the cached result points at the new log file
+    assert instance._analyze_logs.call_args_list[-1] == mock.call([('reg-2', 'd.log')])
+    assert results == [{'registration_id': 'reg-1', 'log_file': 'c.log'}, {'registration_id': 'reg-2', 'log_file': 'd.log'}]
+
+
+def test_cached_analyses_expire_after_the_ttl(tmp_path, monkeypatch):
+    instance = caching_analyzer()
+    now = time.time()
+    monkeypatch.setattr(automated_matchmaking_analyzer.time, 'time', lambda: now - 31 * 86400)
+    instance._analyze_logs_with_cache([('reg-1', 'a.log')], ['reg-1 key'], str(tmp_path))
+    monkeypatch.setattr(automated_matchmaking_analyzer.time, 'time', lambda: now)
+
+    instance._analyze_logs_with_cache([('reg-1', 'a.log')], ['reg-1 key'], str(tmp_path))
+
+    assert instance._analyze_logs.call_count == 2
+
+
+def test_cache_keys_carry_the_cache_version():
+    instance = AWSMatchmakingAnalyzer.__new__(AWSMatchmakingAnalyzer)
+    instance._object_etags = {'day/a.zip': '"a"'}
+
+    assert json.loads(instance._analysis_cache_key('day/a.zip', 'app.log', RID)) == [
+        automated_matchmaking_analyzer.ANALYSIS_CACHE_VERSION, 'day/a.zip', '"a"', 'app.log', RID,
+    ]
+    assert instance._analysis_cache_key('day/b.zip', 'app.log', RID) is None
+
+
+def test_s3_listing_walks_every_page_once_per_prefix():
+    instance = AWSMatchmakingAnalyzer.__new__(AWSMatchmakingAnalyzer)
+    instance.bucket_name = 'logs'
+    instance._object_etags = {}
+    instance._prefix_objects = {}
+    instance._prefix_locks = {}
+    instance._prefix_locks_guard = threading.Lock()
+    instance.s3_client = mock.Mock()
+    paginate = instance.s3_client.get_paginator.return_value.paginate
+    paginate.return_value = [
+        {'Contents': [{'Key': 'day/a.zip', 'ETag': '"a"'}, {'Key': 'day/b.zip', 'ETag': '"b"'}]},
+        {'Contents': [{'Key': 'day/c.zip'}]},
+        {},
+    ]
+
+    assert instance.list_s3_objects('day/') == ['day/a.zip', 'day/b.zip', 'day/c.zip']
+    assert instance.list_s3_objects('day/') == ['day/a.zip', 'day/b.zip', 'day/c.zip']
+    paginate.assert_called_once_with(Bucket='logs', Prefix='day/')
+    assert instance._object_etags == {'day/a.zip': '"a"', 'day/b.zip': '"b"'}
+
+
+@pytest.mark.parametrize('offset', range(8))
+def test_stream_contains_finds_needles_across_read_blocks(monkeypatch, offset):
+    monkeypatch.setattr(automated_matchmaking_analyzer, 'LOG_SCAN_BLOCK_SIZE', 4)
+    content = b'x' * offset + b'"registrationId":"reg-1"' + b'y' * 5
+
+    assert _stream_contains(io.BytesIO(content), b'reg-1') is True
+    assert _stream_contains(io.BytesIO(content), b'reg-2') is False
+
+
+def test_only_the_first_matching_zip_member_is_extracted(tmp_path):
+    zip_path = tmp_path / 'logs.zip'
+    with zipfile.ZipFile(zip_path, 'w') as zip_ref:
+        zip_ref.writestr('a.log', b'reg-2')
+        zip_ref.writestr('b.log', b'reg-1 first')
+        zip_ref.writestr('c.log', b'reg-1 second')
+    extract_dir = tmp_path / 'extracted'
+
+    extracted = AWSMatchmakingAnalyzer.__new__(AWSMatchmakingAnalyzer).extract_registration_log(str(zip_path), str(extract_dir), RID)
+
+    assert extracted == str(extract_dir / 'b.log')
+    assert sorted(path.name for path in extract_dir.iterdir()) == ['b.log']
@@ -0,0 +1,26 @@
+from generate_athena_query import format_sql_in_list, read_id_columns
+
+
+def test_in_list_quotes_every_value():
+    assert format_sql_in_list(['g-1', 42]) == "('g-1', '42')"
+
+
+def test_in_list_escapes_embedded_single_quotes():
+    assert format_sql_in_list(["o'brien", "''"]) == "('o''brien', '''''')"
+
+
+def test_id_columns_are_read_as_strings_and_other_columns_skipped(tmp_path):
+    csv_file = tmp_path / 'failures.csv'
+    csv_file.write_text('game_id,reason,user_id\n00123,timeout,7\ng-2,,8\n')
+    df = read_id_columns(str(csv_file))
+
+    assert list(df.columns) == ['game_id', 'user_id']
+    assert df['game_id'].tolist() == ['00123', 'g-2']
+    assert df['user_id'].tolist() == ['7', '8']
+
+
+def test_missing_id_column_is_absent(tmp_path):
+    csv_file = tmp_path / 'failures.csv'
+    csv_file.write_text('game_id,reason\ng-1,timeout\n')
+
+    assert list(read_id_columns(str(csv_file)).columns) == ['game_id']
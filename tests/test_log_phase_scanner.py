@@ -0,0 +1,148 @@
+import pytest
+
+import log_phase_scanner
+from log_phase_scanner import scan_phase_events
+
+RID = 'reg-1'
+OTHER_RID = 'reg-2'
+
+FINDING = b'"state":"FINDING"'
+ROUND_STARTING = b'"en":"ROUND_STARTING"'
+MATCH_FAILED = b'"en":"MATCH_MAKING_FAILED"'
+LOBBY_TIMEOUT = b'backToLobbyInterval Timer expired'
+
+
+def gameplay(event: bytes, registration_id: str = RID) -> bytes:
+    return b'eventHandler gameplay socket event- {"registrationId":"%s",%s}' % (registration_id.encode(), event)
+
+
+def log(*lines: bytes) -> bytes:
+    return b'\n'.join(lines) + b'\n'
+
+
+@pytest.fixture(params=['regex', 'automaton'], autouse=True)
+def marker_backend(request, monkeypatch):
+    """Run every test against both marker classifiers"""
+    if request.param == 'regex':
+        monkeypatch.setattr(log_phase_scanner, '_PHASE_MARKER_AUTOMATON', None)
+    elif log_phase_scanner._PHASE_MARKER_AUTOMATON is None:
+        pytest.skip('pyahocorasick is not installed')
+    return request.param
+
+
+@pytest.mark.parametrize('lines, expected_state', [
+    # A round that started is a success even when a later retry reports a failure
+    ((gameplay(FINDING), gameplay(ROUND_STARTING), gameplay(MATCH_FAILED)), 'round_starting'),
+    # A failed attempt is superseded by a later round start, with or without a new queue entry
+    ((gameplay(FINDING), gameplay(MATCH_FAILED), gameplay(FINDING), gameplay(ROUND_STARTING)), 'round_starting'),
+    ((gameplay(FINDING), gameplay(MATCH_FAILED), gameplay(ROUND_STARTING)), 'round_starting'),
+    # Re-entering the queue after a failure leaves the latest attempt unresolved
+    ((gameplay(FINDING), gameplay(MATCH_FAILED), gameplay(FINDING)), 'queued'),
+    ((gameplay(FINDING), gameplay(MATCH_FAILED)), 'match_failed'),
+    # Outcomes and timeouts before the user is in the queue do not count
+    ((gameplay(ROUND_STARTING), gameplay(FINDING)), 'queued'),
+    ((LOBBY_TIMEOUT, gameplay(FINDING)), 'queued'),
+    ((gameplay(FINDING), LOBBY_TIMEOUT), 'lobby_timeout'),
+    ((gameplay(FINDING), LOBBY_TIMEOUT, gameplay(FINDING), gameplay(ROUND_STARTING)), 'round_starting'),
+    # Events of other registrations are interleaved in the same log
+    ((gameplay(FINDING), gameplay(ROUND_STARTING, OTHER_RID), gameplay(MATCH_FAILED)), 'match_failed'),
+    ((gameplay(MATCH_FAILED),), None),
+])
+def test_matchmaking_state_follows_event_order(lines, expected_state):
+    events = scan_phase_events(log(*lines), RID)
+
+    assert events['matchmaking_state'] == expected_state
+    assert events['queue_entered'] == (expected_state is not None)
+    assert events['round_starting'] == (expected_state == 'round_starting')
+    assert events['match_failed'] == (expected_state == 'match_failed')
+    assert events['lobby_timeout'] == (expected_state == 'lobby_timeout')
+
+
+def test_matchmaking_event_needs_the_id_before_it_on_a_gameplay_line():
+    content = log(
+        b'eventHandler gameplay socket event- {"state":"FINDING","registrationId":"reg-1"}',
+        b'{"registrationId":"reg-1","state":"FINDING"}',
+        b'eventHandler gameplay socket event- {"registrationId":"reg-1"}',
+        FINDING,
+    )
+
+    assert scan_phase_events(content, RID)['queue_entered'] is False
+
+
+REGISTER_REQUEST = b'API New Request: /v1.0/super/tournament/registerTournament {"tournamentId":"t-1"}'
+REGISTER_SUCCESS = (b'API Success: /v1.0/super/tournament/registerTournament '
+                    b'{"success":true,"data":{"registrationId":"reg-1","entryFee":25.5}}')
+DETAILS_REQUEST = b'API New Request: /v1.0/super/tournament/getTournamentDetails {"registrationId":"reg-1"}'
+DETAILS_SUCCESS = (b'API Success: /v1.0/super/tournament/getTournamentDetails {"registrationId":"reg-1",'
+                   b'"registrationStatus":"TABLE_ASSIGNED","gameplayServer":{"gameId":"g-9","podip":"10.0.0.7"}}')
+SOCKET_URL = b'Socket url- wss://gameplay {"registrationId":"reg-1"}'
+SOCKET_CONNECTED = b'Socket connected with id- abc {"registrationId":"reg-1"}'
+SOCKET_FAILED = b'Socket connection failed- timeout {"registrationId":"reg-1"}'
+
+SUCCESSFUL_LOG = log(
+    REGISTER_REQUEST, REGISTER_SUCCESS, DETAILS_REQUEST, DETAILS_SUCCESS,
+    SOCKET_URL, SOCKET_CONNECTED, gameplay(FINDING), gameplay(ROUND_STARTING),
+)
+
+
+def test_successful_log_passes_every_check():
+    events = scan_phase_events(SUCCESSFUL_LOG, RID)
+
+    assert events['register_requests'] == 1
+    assert events['register_success'] is True
+    assert events['entry_fee'] == b'25.5'
+    assert events['details_request'] is True
+    assert events['table_assigned'] is True
+    assert events['game_server'] == ('g-9', '10.0.0.7')
+    assert events['socket_attempt'] is True
+    assert events['socket_connected'] is True
+    assert events['socket_connections'] == 1
+    assert events['socket_failed'] is False
+    assert events['queue_entered'] is True
+    assert events['matchmaking_state'] == 'round_starting'
+
+
+def test_log_without_the_registration_only_counts_register_requests():
+    content = SUCCESSFUL_LOG.replace(b'reg-1', b'reg-2') + log(REGISTER_REQUEST)
+    events = scan_phase_events(content, RID)
+
+    assert events['register_requests'] == 2
+    assert not any(events[key] for key in log_phase_scanner._REGISTRATION_EVENTS)
+    assert events['entry_fee'] is None and events['game_server'] is None
+
+
+def test_table_assignment_needs_the_status_after_the_id():
+    content = log(
+        b'API Success: /v1.0/super/tournament/getTournamentDetails {"registrationStatus":"TABLE_ASSIGNED","registrationId":"reg-1"}',
+    )
+
+    assert scan_phase_events(content, RID)['table_assigned'] is False
+
+
+def test_socket_checks_need_the_id_on_the_marker_line():
+    content = log(
+        b'Socket url- wss://gameplay', b'{"registrationId":"reg-1"}',
+        b'Socket connection failed- timeout', b'{"registrationId":"reg-1"}',
+    )
+    events = scan_phase_events(content, RID)
+
+    assert events['socket_attempt'] is False
+    assert events['socket_failed'] is False
+
+
+def test_socket_connections_are_counted_once_per_line():
+    content = log(
+        b'Socket connected with id- a Socket connected with id- b {"registrationId":"reg-1"}',
+        SOCKET_CONNECTED,
+        b'Socket connected with id- c {"registrationId":"reg-2"}',
+    )
+
+    assert scan_phase_events(content, RID)['socket_connections'] == 2
+
+
+def test_markers_straddling_scan_blocks_are_found_once(monkeypatch):
+    expected = scan_phase_events(SUCCESSFUL_LOG + log(REGISTER_REQUEST), RID)
+    # Block sizes smaller than the markers force every marker across at least one block boundary
+    for block_size in (7, 13, 64):
+        monkeypatch.setattr(log_phase_scanner, 'LOG_SCAN_BLOCK_SIZE', block_size)
+        assert scan_phase_events(SUCCESSFUL_LOG + log(REGISTER_REQUEST), RID) == expected